@@ -1,30 +1,107 @@
 __VERSION__ = "0.1.6"
 __AUTHOR__ = "RecRanger"
 
+from .array_search import ArraySearchResult, search_array_in_file
 from .cli import main_cli
+from .index_compact import (
+    CompactIndex,
+    load_index_compact,
+    load_or_generate_compact_index,
+    store_index_compact,
+)
 from .index_create import (
+    choose_index_block_size,
     generate_index,
+    generate_index_aligned,
     load_index_json,
     load_index_parquet,
     load_or_generate_index,
     store_index_json,
     store_index_parquet,
 )
+from .index_hash import HashIndex, generate_hash_index, load_or_generate_hash_index
 from .index_search import (
+    SortedIndexLocator,
+    load_or_generate_search_index,
+    search_batch_in_file_with_index,
     search_in_file_with_index,
     search_multiple_in_file,  # <- main library function
 )
-from .index_types import IndexEntry
+from .index_search_async import AsyncHaystackSearcher, check_addresses
+from .index_shared import (
+    SharedIndex,
+    SharedIndexRegistry,
+    attach_index,
+    open_index_file,
+    publish_index,
+    shared_index_name,
+    write_index_file,
+)
+from .index_types import (
+    ChunkLocator,
+    IndexEntry,
+    IndexOptions,
+    IndexType,
+    SearchIndex,
+)
+from .multi_search import HaystackSpec, search_multiple_in_haystacks
+from .result_cache import ResultCache, compute_haystack_delta, haystack_fingerprint
+from .scan_file import (
+    scan_file_for_used_addresses,
+    scan_file_for_used_addresses_multi,
+)
+from .scan_follow import (
+    FileCheckpoint,
+    UsedAddressMatch,
+    follow_files_for_used_addresses,
+)
 
 __all__ = [
+    "ArraySearchResult",
+    "AsyncHaystackSearcher",
+    "ChunkLocator",
+    "CompactIndex",
+    "FileCheckpoint",
+    "HashIndex",
+    "HaystackSpec",
     "IndexEntry",
+    "IndexOptions",
+    "IndexType",
+    "ResultCache",
+    "SearchIndex",
+    "SharedIndex",
+    "SharedIndexRegistry",
+    "SortedIndexLocator",
+    "UsedAddressMatch",
+    "attach_index",
+    "check_addresses",
+    "choose_index_block_size",
+    "compute_haystack_delta",
+    "follow_files_for_used_addresses",
+    "generate_hash_index",
     "generate_index",
+    "generate_index_aligned",
+    "haystack_fingerprint",
+    "load_index_compact",
     "load_index_json",
     "load_index_parquet",
+    "load_or_generate_compact_index",
+    "load_or_generate_hash_index",
     "load_or_generate_index",
+    "load_or_generate_search_index",
     "main_cli",
+    "open_index_file",
+    "publish_index",
+    "scan_file_for_used_addresses",
+    "scan_file_for_used_addresses_multi",
+    "search_array_in_file",
+    "search_batch_in_file_with_index",
     "search_in_file_with_index",
     "search_multiple_in_file",
+    "search_multiple_in_haystacks",
+    "shared_index_name",
+    "store_index_compact",
     "store_index_json",
     "store_index_parquet",
+    "write_index_file",
 ]
@@ -0,0 +1,263 @@
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, TypeAlias
+
+import polars as pl
+from loguru import logger
+
+from used_addr_check.index_create import load_or_generate_index
+from used_addr_check.index_types import IndexEntry, IndexOptions
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pyarrow as pa
+
+# Any column of needles accepted by `search_array_in_file`.
+NeedleArray: TypeAlias = "pl.Series | pa.Array | pa.ChunkedArray | np.ndarray"
+# A result column, of the same kind as the `NeedleArray` it answers.
+ResultArray: TypeAlias = "pl.Series | pa.Array | np.ndarray"
+
+# Max number of haystack bytes held in memory at once. Chunks are read and
+# joined against their needles in batches of about this size.
+ARRAY_SEARCH_MAX_BATCH_BYTES = 256 * 1024 * 1024
+
+
+@dataclass
+class ArraySearchResult:
+    """The result of `search_array_in_file`, aligned row-for-row with the input.
+
+    Both columns are of the same kind as the input needles: a polars Series, a
+    pyarrow Array, or a NumPy array.
+
+    - found: Boolean mask; True where the needle is in the haystack.
+    - line_numbers: The (0-based) haystack line number of each found needle, or
+        None if not requested. Null where not found (-1 for NumPy output).
+    """
+
+    found: "ResultArray"
+    line_numbers: "ResultArray | None" = None
+
+
+def _is_numpy_array(needles: object) -> bool:
+    # NumPy is optional. If the caller passed a NumPy array, it's imported.
+    np_module = sys.modules.get("numpy")
+    return np_module is not None and isinstance(needles, np_module.ndarray)
+
+
+def _is_arrow_array(needles: object) -> bool:
+    # PyArrow is optional. If the caller passed an Arrow array, it's imported.
+    pa_module = sys.modules.get("pyarrow")
+    return pa_module is not None and isinstance(
+        needles, pa_module.Array | pa_module.ChunkedArray
+    )
+
+
+def _to_needle_series(needles: "NeedleArray") -> pl.Series:
+    """Wraps the needles in a polars String Series, without per-row conversion
+    to Python objects (zero-copy where the memory layout allows).
+    """
+    if isinstance(needles, pl.Series):
+        series = needles
+    elif _is_arrow_array(needles):
+        series = pl.Series(pl.from_arrow(needles))
+    elif _is_numpy_array(needles):
+        # Fixed-width bytes (dtype "S") become Binary; str (dtype "U") String.
+        series = pl.Series(needles)
+    else:
+        msg = (
+            "needles must be a polars Series, a pyarrow Array, or a NumPy array, "
+            f"got {type(needles).__name__}"
+        )
+        raise TypeError(msg)
+
+    if series.dtype == pl.Binary:
+        series = series.cast(pl.String)
+    if series.dtype != pl.String:
+        msg = f"needles must be strings or bytes, got dtype {series.dtype}"
+        raise TypeError(msg)
+    return series
+
+
+def _from_result_series(series: pl.Series, needles: "NeedleArray") -> "ResultArray":
+    """Converts a result column to the same kind of array as the input needles."""
+    if isinstance(needles, pl.Series):
+        return series
+    if _is_arrow_array(needles):
+        return series.to_arrow()
+    if series.dtype.is_integer():
+        series = series.cast(pl.Int64).fill_null(-1)  # NumPy has no nulls.
+    return series.to_numpy()
+
+
+def _read_chunk_frame(
+    file: BinaryIO,
+    entry: IndexEntry,
+    end_offset: int | None,
+) -> pl.DataFrame:
+    """Reads a haystack chunk into a `(line, line_number)` DataFrame. The lines
+    are split and stripped by polars, not as Python objects.
+    """
+    file.seek(entry.byte_offset)
+    data = file.read(-1 if end_offset is None else end_offset - entry.byte_offset)
+    lines = (
+        pl.Series("line", [data], dtype=pl.Binary)
+        .cast(pl.String)
+        .str.split("\n")
+        .explode()
+        .str.strip_chars()
+    )
+    return (
+        pl.DataFrame({"line": lines})
+        .with_columns(
+            line_number=pl.int_range(pl.len(), dtype=pl.UInt64) + entry.line_number
+        )
+        .filter(pl.col("line") != "")
+    )
+
+
+def _batch_chunk_positions(
+    chunk_positions: list[int],
+    index: list[IndexEntry],
+    haystack_file_size: int,
+    max_batch_bytes: int,
+) -> list[list[int]]:
+    """Splits the (sorted) chunk positions into batches of about
+    `max_batch_bytes` of haystack data each.
+    """
+    batches: list[list[int]] = []
+    batch: list[int] = []
+    batch_bytes = 0
+    for position in chunk_positions:
+        end_offset = haystack_file_size
+        if position + 1 < len(index):
+            end_offset = index[position + 1].byte_offset
+        chunk_bytes = end_offset - index[position].byte_offset
+        if batch and batch_bytes + chunk_bytes > max_batch_bytes:
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(position)
+        batch_bytes += chunk_bytes
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _search_needle_series(
+    haystack_file_path: Path,
+    needles: pl.Series,
+    index: list[IndexEntry],
+    max_batch_bytes: int,
+) -> pl.Series:
+    """Returns the haystack line number of each needle (null if not found)."""
+    index_keys = pl.Series([entry.line_value for entry in index], dtype=pl.String)
+
+    # The chunk that each needle could be in. -1 sorts before the first line.
+    needles_df = (
+        pl.DataFrame({"needle": needles})
+        .with_row_index("row")
+        .with_columns(
+            chunk=index_keys.search_sorted(needles, side="right").cast(pl.Int64) - 1
+        )
+        .filter(pl.col("needle").is_not_null() & (pl.col("chunk") >= 0))
+    )
+    chunk_positions: list[int] = needles_df["chunk"].unique().sort().to_list()
+
+    found_frames: list[pl.DataFrame] = []
+    haystack_file_size = haystack_file_path.stat().st_size
+    with haystack_file_path.open("rb") as file:
+        for batch in _batch_chunk_positions(
+            chunk_positions, index, haystack_file_size, max_batch_bytes
+        ):
+            haystack_lines = pl.concat(
+                [
+                    _read_chunk_frame(
+                        file,
+                        index[position],
+                        index[position + 1].byte_offset
+                        if position + 1 < len(index)
+                        else None,
+                    )
+                    for position in batch
+                ]
+            )
+            # All needles with a chunk in [first, last] have a chunk in `batch`.
+            batch_needles = needles_df.filter(
+                pl.col("chunk").is_between(batch[0], batch[-1])
+            )
+            found_frames.append(
+                batch_needles.join(
+                    haystack_lines, left_on="needle", right_on="line", how="inner"
+                )
+                .unique(subset="row", keep="first")
+                .select("row", "line_number")
+            )
+
+    line_numbers = pl.repeat(None, len(needles), dtype=pl.UInt64, eager=True)
+    if found_frames:
+        found = pl.concat(found_frames)
+        line_numbers = line_numbers.scatter(found["row"], found["line_number"])
+    return line_numbers
+
+
+def search_array_in_file(  # noqa: PLR0913
+    haystack_file_path: Path | str,
+    needles: "NeedleArray",
+    *,
+    index_options: IndexOptions | None = None,
+    index: list[IndexEntry] | None = None,
+    with_line_numbers: bool = False,
+    max_batch_bytes: int = ARRAY_SEARCH_MAX_BATCH_BYTES,
+) -> ArraySearchResult:
+    """Searches for a whole column of needles, and returns a per-row result.
+
+    Unlike `search_multiple_in_file`, the needles are never converted to Python
+    strings: chunk lookup, haystack line splitting, and matching are all done
+    by polars, in batches of about `max_batch_bytes` of haystack data.
+
+    Args:
+    - haystack_file_path (Path): The path to the file to search.
+    - needles: A polars Series, pyarrow Array/ChunkedArray, or NumPy array of
+        strings or bytes. Nulls are never found.
+    - index_options: How to generate the index, if needed. See
+        `IndexOptions`. Only the "sorted" index type is supported.
+    - index: An already-loaded sorted index to use. If None, it is loaded.
+    - with_line_numbers: Whether to also return the haystack line numbers.
+    - max_batch_bytes: Max number of haystack bytes held in memory at once.
+
+    Returns: An `ArraySearchResult`, aligned with `needles`, with columns of the
+        same kind as `needles`.
+    """
+    haystack_file_path = Path(haystack_file_path)  # normalize to Path
+    assert haystack_file_path.exists(), f"File not found: {haystack_file_path}"
+    assert max_batch_bytes > 0
+    if index_options is None:
+        index_options = IndexOptions()
+    if index_options.index_type != "sorted":
+        msg = (
+            "search_array_in_file only supports the 'sorted' index type, "
+            f"got {index_options.index_type!r}"
+        )
+        raise ValueError(msg)
+
+    needle_series = _to_needle_series(needles)
+    if index is None:
+        index = load_or_generate_index(
+            haystack_file_path,
+            index_options.index_chunk_size,
+            index_block_size=index_options.index_block_size,
+            index_memory_budget=index_options.index_memory_budget,
+        )
+
+    line_numbers = _search_needle_series(
+        haystack_file_path, needle_series, index, max_batch_bytes
+    )
+    found = line_numbers.is_not_null().alias("found")
+    logger.info(f"Found {found.sum():,}/{len(found):,} needles in the haystack")
+
+    return ArraySearchResult(
+        found=_from_result_series(found, needles),
+        line_numbers=(
+            _from_result_series(line_numbers, needles) if with_line_numbers else None
+        ),
+    )
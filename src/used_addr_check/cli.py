@@ -1,13 +1,23 @@
 import argparse
 import sys
 from pathlib import Path
+from typing import get_args
 
 from used_addr_check import __VERSION__
 from used_addr_check.defaults import DEFAULT_INDEX_CHUNK_SIZE
 from used_addr_check.download_list import BITCOIN_LIST_URL, download_list
-from used_addr_check.index_create import load_or_generate_index
-from used_addr_check.index_search import search_multiple_in_file
-from used_addr_check.scan_file import scan_file_for_used_addresses
+from used_addr_check.index_search import (
+    load_or_generate_search_index,
+    search_multiple_in_file,
+)
+from used_addr_check.index_types import IndexOptions, IndexType
+from used_addr_check.multi_search import search_multiple_in_haystacks
+from used_addr_check.result_cache import ResultCache
+from used_addr_check.scan_file import (
+    scan_file_for_used_addresses,
+    scan_file_for_used_addresses_multi,
+)
+from used_addr_check.scan_follow import follow_files_for_used_addresses
 
 
 def main_cli() -> None:
@@ -29,6 +39,57 @@ def main_cli() -> None:
         default=DEFAULT_INDEX_CHUNK_SIZE,
         help="Size of chunks to store in the parquet index file",
     )
+    parser.add_argument(
+        "--index-block-kib",
+        dest="index_block_kib",
+        type=int,
+        default=None,
+        help=(
+            "Generate an aligned index, with one entry per block of this many "
+            "KiB (multiple of 4). Overrides --index-chunk-size"
+        ),
+    )
+    parser.add_argument(
+        "--index-memory-budget-mib",
+        dest="index_memory_budget_mib",
+        type=int,
+        default=None,
+        help=(
+            "Generate an aligned index, choosing the block size so the loaded "
+            "index fits in about this many MiB of memory"
+        ),
+    )
+    parser.add_argument(
+        "--index-type",
+        dest="index_type",
+        choices=get_args(IndexType),
+        default="sorted",
+        help=(
+            "Kind of index to use. 'front_coded' is a prefix-compressed copy of "
+            "the sorted index, which uses much less memory. 'hash' is an on-disk "
+            "hash table, for the lowest latency exact-match lookups"
+        ),
+    )
+    parser.add_argument(
+        "--result-cache",
+        dest="result_cache_file_path",
+        default=None,
+        help=(
+            "SQLite file in which to persist lookup results across runs. Used "
+            "addresses are never re-checked, and unused addresses are only "
+            "re-checked against addresses added to the haystack since"
+        ),
+    )
+    parser.add_argument(
+        "--previous-haystack",
+        dest="previous_haystack_file_path",
+        default=None,
+        help=(
+            "With --result-cache, a previous version of the haystack file. The "
+            "addresses added since are computed once, so cached results can be "
+            "re-checked against only those"
+        ),
+    )
     subparsers = parser.add_subparsers(dest="command")
 
     # # Subparser for the 'download' command
@@ -59,7 +120,7 @@ def main_cli() -> None:
         "index",
         help=(
             "Index a haystack 'used addresses' file, "
-            "and save it to orig_name.txt.index.json"
+            "and save it to orig_name.index.parquet (or .index.fc, .index.hash)"
         ),
     )
     index_parser.add_argument(
@@ -75,9 +136,13 @@ def main_cli() -> None:
     search_parser.add_argument(
         "-f",
         "--haystack",
-        dest="haystack_file_path",
+        dest="haystack_file_paths",
         required=True,
-        help="Haystack address list file path (.txt)",
+        action="append",
+        help=(
+            "Haystack address list file path (.txt). Repeat to search several "
+            "haystacks in one pass"
+        ),
     )
     search_parser.add_argument(
         "-n",
@@ -96,9 +161,13 @@ def main_cli() -> None:
     scan_file_parser.add_argument(
         "-f",
         "--haystack",
-        dest="haystack_file_path",
+        dest="haystack_file_paths",
         required=True,
-        help="Haystack address list file path (.txt)",
+        action="append",
+        help=(
+            "Haystack address list file path (.txt). Repeat to search several "
+            "haystacks in one pass"
+        ),
     )
     scan_file_parser.add_argument(
         "-n",
@@ -108,6 +177,31 @@ def main_cli() -> None:
         help="Needle file path, with list of addresses. Addresses will be "
         "extracted from this file",
     )
+    scan_file_parser.add_argument(
+        "--follow",
+        dest="follow",
+        action="store_true",
+        help=(
+            "Keep watching the needle file, and only scan newly appended data. "
+            "Used addresses are printed to stdout as they are found"
+        ),
+    )
+    scan_file_parser.add_argument(
+        "--checkpoint",
+        dest="checkpoint_file_path",
+        default=None,
+        help=(
+            "With --follow, the file in which to persist how far the needle file "
+            "has been scanned. Defaults to orig_name.checkpoint.json"
+        ),
+    )
+    scan_file_parser.add_argument(
+        "--poll-interval",
+        dest="poll_interval",
+        type=float,
+        default=1.0,
+        help="With --follow, seconds to wait between checks for new data",
+    )
 
     args = parser.parse_args()
 
@@ -115,28 +209,113 @@ def main_cli() -> None:
         print(f"used_addr_scan version v{__VERSION__}")  # noqa: T201
         sys.exit(0)
     elif args.command == "index":
-        load_or_generate_index(
-            haystack_file_path=Path(args.haystack_file_path),
-            force_recreate=True,
-            index_chunk_size=args.index_chunk_size,
+        load_or_generate_search_index(
+            Path(args.haystack_file_path), _index_options(args), force_recreate=True
         )
     elif args.command == "search":
-        search_multiple_in_file(
-            Path(args.haystack_file_path),
-            args.needles,
-            index_chunk_size=args.index_chunk_size,
-        )
+        if args.result_cache_file_path and len(args.haystack_file_paths) > 1:
+            parser.error("--result-cache supports a single haystack file")
+        _run_search(args)
     elif args.command == "download":
         download_list(Path(args.output_path))
     elif args.command == "scan_file":
-        scan_file_for_used_addresses(
-            Path(args.haystack_file_path),
-            Path(args.needle_haystack_file_path),
-            index_chunk_size=args.index_chunk_size,
-        )
+        if args.follow and len(args.haystack_file_paths) > 1:
+            parser.error("--follow supports a single haystack file")
+        if args.follow and (
+            args.result_cache_file_path or args.previous_haystack_file_path
+        ):
+            parser.error("--result-cache/--previous-haystack don't support --follow")
+        if args.result_cache_file_path and len(args.haystack_file_paths) > 1:
+            parser.error("--result-cache supports a single haystack file")
+        _run_scan_file(args)
     else:
         parser.print_help()
 
 
+def _index_options(args: argparse.Namespace) -> IndexOptions:
+    """Converts the CLI's index options (sizes in KiB/MiB) to `IndexOptions`."""
+    index_block_size = None
+    if args.index_block_kib is not None:
+        index_block_size = args.index_block_kib * 1024
+    index_memory_budget = None
+    if args.index_memory_budget_mib is not None:
+        index_memory_budget = args.index_memory_budget_mib * 1024 * 1024
+    return IndexOptions(
+        index_type=args.index_type,
+        index_chunk_size=args.index_chunk_size,
+        index_block_size=index_block_size,
+        index_memory_budget=index_memory_budget,
+    )
+
+
+def _open_result_cache(args: argparse.Namespace) -> ResultCache | None:
+    """Opens the `--result-cache`, registering the `--previous-haystack` delta."""
+    if args.result_cache_file_path is None:
+        return None
+    result_cache = ResultCache(Path(args.result_cache_file_path))
+    if args.previous_haystack_file_path is not None:
+        result_cache.register_delta(
+            Path(args.previous_haystack_file_path), Path(args.haystack_file_paths[0])
+        )
+    return result_cache
+
+
+def _run_search(args: argparse.Namespace) -> None:
+    if len(args.haystack_file_paths) > 1:
+        search_multiple_in_haystacks(
+            {path: Path(path) for path in args.haystack_file_paths},
+            args.needles,
+            index_options=_index_options(args),
+        )
+    else:
+        result_cache = _open_result_cache(args)
+        try:
+            search_multiple_in_file(
+                Path(args.haystack_file_paths[0]),
+                args.needles,
+                index_options=_index_options(args),
+                result_cache=result_cache,
+            )
+        finally:
+            if result_cache is not None:
+                result_cache.close()
+
+
+def _run_scan_file(args: argparse.Namespace) -> None:
+    needle_file_path = Path(args.needle_haystack_file_path)
+    if args.follow:
+        checkpoint_file_path = (
+            Path(args.checkpoint_file_path)
+            if args.checkpoint_file_path
+            else needle_file_path.with_suffix(".checkpoint.json")
+        )
+        for match in follow_files_for_used_addresses(
+            Path(args.haystack_file_paths[0]),
+            [needle_file_path],
+            checkpoint_file_path,
+            index_options=_index_options(args),
+            poll_interval=args.poll_interval,
+        ):
+            print(match.address, flush=True)  # noqa: T201
+    elif len(args.haystack_file_paths) > 1:
+        scan_file_for_used_addresses_multi(
+            {path: Path(path) for path in args.haystack_file_paths},
+            needle_file_path,
+            index_options=_index_options(args),
+        )
+    else:
+        result_cache = _open_result_cache(args)
+        try:
+            scan_file_for_used_addresses(
+                Path(args.haystack_file_paths[0]),
+                needle_file_path,
+                index_options=_index_options(args),
+                result_cache=result_cache,
+            )
+        finally:
+            if result_cache is not None:
+                result_cache.close()
+
+
 if __name__ == "__main__":
     main_cli()
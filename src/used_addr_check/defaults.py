@@ -1,2 +1,14 @@
 # Tested 150, 1000, 10_000, 50_000, and found 10_000 to be optimal speed
 DEFAULT_INDEX_CHUNK_SIZE = 10_000
+
+# Aligned index mode: entries are placed at the first line start after each
+# block boundary. Block sizes are a multiple of the typical page size.
+MIN_INDEX_BLOCK_SIZE = 4096
+
+# Rough in-memory size of one `IndexEntry` (dataclass, str, and two ints), used
+# to pick a block size from an index memory budget.
+INDEX_ENTRY_MEMORY_ESTIMATE = 264
+
+# Rough in-memory size of one `CompactIndex` entry (front-coded key suffix and
+# varint deltas), used instead of the above for the "front_coded" index type.
+COMPACT_INDEX_ENTRY_MEMORY_ESTIMATE = 36
@@ -0,0 +1,297 @@
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+from loguru import logger
+
+from used_addr_check.defaults import (
+    COMPACT_INDEX_ENTRY_MEMORY_ESTIMATE,
+    DEFAULT_INDEX_CHUNK_SIZE,
+)
+from used_addr_check.index_create import (
+    choose_index_block_size,
+    load_or_generate_index,
+)
+from used_addr_check.index_types import ChunkRange, IndexEntry
+
+# Number of index entries per front-coded block. Each block starts with a full
+# key and absolute offsets (a "restart point"), so it can be decoded on its own.
+DEFAULT_RESTART_INTERVAL = 16
+
+_MAGIC = b"UACFC001"
+# magic, restart_interval, entry_count, block_count
+_HEADER = struct.Struct("<8sIQQ")
+
+
+def _encode_varint(value: int, out: bytearray) -> None:
+    """Appends an unsigned LEB128 varint to `out`."""
+    while value >= 0x80:  # noqa: PLR2004
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_varint(data: bytes | memoryview, pos: int) -> tuple[int, int]:
+    """Decodes an unsigned LEB128 varint at `pos`.
+
+    Returns: A tuple of (value, position after the varint).
+    """
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:  # noqa: PLR2004
+            return result, pos
+        shift += 7
+
+
+def _common_prefix_len(a: bytes, b: bytes) -> int:
+    max_len = min(len(a), len(b))
+    i = 0
+    while i < max_len and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class CompactIndex:
+    """A compact, front-coded representation of a `list[IndexEntry]`.
+
+    Entries are grouped into blocks of `restart_interval` entries. Within a
+    block, each key is stored as (shared prefix length, suffix) relative to the
+    previous key, and the byte offset and line number are stored as deltas. All
+    integers are varints. The first entry of each block is stored in full.
+
+    A lookup binary-searches the first key of each block, then decodes only the
+    one block it lands in.
+
+    Block layout:
+    - First entry: `key_len, key, byte_offset, line_number`
+    - Other entries: `shared_len, suffix_len, suffix, offset_delta, line_delta`
+    """
+
+    def __init__(
+        self,
+        blob: bytes | memoryview,
+        block_starts: array,
+        entry_count: int,
+        restart_interval: int,
+    ) -> None:
+        self._blob = blob
+        self._block_starts = block_starts
+        self.entry_count = entry_count
+        self.restart_interval = restart_interval
+
+    @classmethod
+    def from_entries(
+        cls,
+        entries: list[IndexEntry],
+        restart_interval: int = DEFAULT_RESTART_INTERVAL,
+    ) -> "CompactIndex":
+        """Builds a compact index from a sorted `list[IndexEntry]`."""
+        assert restart_interval > 0
+        blob = bytearray()
+        block_starts = array("Q")
+
+        prev_key = b""
+        prev_entry: IndexEntry | None = None
+        for i, entry in enumerate(entries):
+            key = entry.line_value.encode("utf-8")
+            if i % restart_interval == 0:
+                block_starts.append(len(blob))
+                _encode_varint(len(key), blob)
+                blob += key
+                _encode_varint(entry.byte_offset, blob)
+                _encode_varint(entry.line_number, blob)
+            else:
+                assert prev_entry is not None
+                shared_len = _common_prefix_len(prev_key, key)
+                _encode_varint(shared_len, blob)
+                _encode_varint(len(key) - shared_len, blob)
+                blob += key[shared_len:]
+                _encode_varint(entry.byte_offset - prev_entry.byte_offset, blob)
+                _encode_varint(entry.line_number - prev_entry.line_number, blob)
+            prev_key = key
+            prev_entry = entry
+
+        block_starts.append(len(blob))  # Sentinel: end of the last block.
+        return cls(bytes(blob), block_starts, len(entries), restart_interval)
+
+    def __len__(self) -> int:
+        return self.entry_count
+
+    @property
+    def block_count(self) -> int:
+        return len(self._block_starts) - 1
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate in-memory size of the encoded index, in bytes."""
+        return len(self._blob) + self._block_starts.itemsize * len(self._block_starts)
+
+    def _decode_block_head(self, block: int) -> tuple[bytes, int]:
+        """Returns the (key, byte offset) of the first entry of a block."""
+        pos = self._block_starts[block]
+        key_len, pos = _decode_varint(self._blob, pos)
+        key = bytes(self._blob[pos : pos + key_len])
+        byte_offset, _ = _decode_varint(self._blob, pos + key_len)
+        return key, byte_offset
+
+    def _decode_block(self, block: int) -> list[IndexEntry]:
+        """Decodes all entries of a block."""
+        blob = self._blob
+        pos = self._block_starts[block]
+        end = self._block_starts[block + 1]
+
+        key_len, pos = _decode_varint(blob, pos)
+        key = bytes(blob[pos : pos + key_len])
+        pos += key_len
+        byte_offset, pos = _decode_varint(blob, pos)
+        line_number, pos = _decode_varint(blob, pos)
+        entries = [IndexEntry(key.decode("utf-8"), byte_offset, line_number)]
+
+        while pos < end:
+            shared_len, pos = _decode_varint(blob, pos)
+            suffix_len, pos = _decode_varint(blob, pos)
+            key = key[:shared_len] + bytes(blob[pos : pos + suffix_len])
+            pos += suffix_len
+            offset_delta, pos = _decode_varint(blob, pos)
+            line_delta, pos = _decode_varint(blob, pos)
+            byte_offset += offset_delta
+            line_number += line_delta
+            entries.append(IndexEntry(key.decode("utf-8"), byte_offset, line_number))
+        return entries
+
+    def to_entries(self) -> list[IndexEntry]:
+        """Decodes the whole index back into a `list[IndexEntry]`."""
+        entries: list[IndexEntry] = []
+        for block in range(self.block_count):
+            entries.extend(self._decode_block(block))
+        return entries
+
+    def locate_chunk(self, needle: str) -> ChunkRange | None:
+        """Returns the byte range of the chunk that `needle` could be in, or None
+        if the needle sorts before the first index entry.
+        """
+        needle_key = needle.encode("utf-8")
+
+        # Binary search for the last block whose first key is <= needle.
+        lo, hi = 0, self.block_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._decode_block_head(mid)[0] <= needle_key:
+                lo = mid + 1
+            else:
+                hi = mid
+        block = lo - 1
+        if block < 0:
+            return None
+
+        entries = self._decode_block(block)
+        position = len(entries) - 1
+        while entries[position].line_value.encode("utf-8") > needle_key:
+            position -= 1
+
+        start_offset = entries[position].byte_offset
+        end_offset = None
+        if position + 1 < len(entries):
+            end_offset = entries[position + 1].byte_offset
+        elif block + 1 < self.block_count:
+            end_offset = self._decode_block_head(block + 1)[1]
+        return start_offset, end_offset
+
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(
+            _MAGIC, self.restart_interval, self.entry_count, self.block_count
+        )
+        block_starts = array("Q", self._block_starts)
+        if sys.byteorder == "big":
+            block_starts.byteswap()  # Always store little-endian.
+        return header + block_starts.tobytes() + bytes(self._blob)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CompactIndex":
+        magic, restart_interval, entry_count, block_count = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            msg = f"Not a compact index file (bad magic: {magic!r})"
+            raise ValueError(msg)
+
+        block_starts = array("Q")
+        block_starts_len = (block_count + 1) * block_starts.itemsize
+        block_starts.frombytes(data[_HEADER.size : _HEADER.size + block_starts_len])
+        if sys.byteorder == "big":
+            block_starts.byteswap()
+        blob = data[_HEADER.size + block_starts_len :]
+        return cls(blob, block_starts, entry_count, restart_interval)
+
+
+def store_index_compact(index: CompactIndex, index_compact_file_path: Path) -> None:
+    """
+    Stores a compact index in a file for later use.
+
+    Args:
+    - index (CompactIndex): The index to store.
+    - index_compact_file_path (Path): The path to store the index.
+    """
+    with index_compact_file_path.open("wb") as file:
+        file.write(index.to_bytes())
+
+
+def load_index_compact(index_compact_file_path: Path) -> CompactIndex:
+    """
+    Loads a compact index from a file.
+
+    Args:
+    - index_compact_file_path (Path): The path to the compact index file.
+
+    Returns:
+    - CompactIndex: The loaded index.
+    """
+    return CompactIndex.from_bytes(index_compact_file_path.read_bytes())
+
+
+def load_or_generate_compact_index(
+    haystack_file_path: Path,
+    index_chunk_size: int = DEFAULT_INDEX_CHUNK_SIZE,
+    *,
+    force_recreate: bool = False,
+    index_block_size: int | None = None,
+    index_memory_budget: int | None = None,
+) -> CompactIndex:
+    """Attempts to load a compact index from `orig_name.index.fc`, or generates
+    one if it doesn't exist, or if `force_recreate` is enabled.
+
+    The compact index is built from the regular index (which is loaded or
+    generated as per `load_or_generate_index`, with the same arguments). An
+    `index_memory_budget` is applied to the size of the compact index, which
+    is much smaller per entry than a `list[IndexEntry]`.
+    """
+    index_compact_file_path = haystack_file_path.with_suffix(".index.fc")
+
+    if not force_recreate and index_compact_file_path.exists():
+        logger.info("Loading index from compact file")
+        compact_index = load_index_compact(index_compact_file_path)
+        logger.info(f"Index loaded with {len(compact_index):,} entries")
+        return compact_index
+
+    if index_block_size is None and index_memory_budget is not None:
+        index_block_size = choose_index_block_size(
+            haystack_file_path.stat().st_size,
+            index_memory_budget,
+            COMPACT_INDEX_ENTRY_MEMORY_ESTIMATE,
+        )
+    index = load_or_generate_index(
+        haystack_file_path,
+        index_chunk_size,
+        force_recreate=force_recreate,
+        index_block_size=index_block_size,
+    )
+    compact_index = CompactIndex.from_entries(index)
+    store_index_compact(compact_index, index_compact_file_path)
+    logger.info(
+        f"Compact index stored in {index_compact_file_path.name}, "
+        f"size: {index_compact_file_path.stat().st_size:,} bytes"
+    )
+    return compact_index
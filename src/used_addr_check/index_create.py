@@ -5,7 +5,11 @@ import polars as pl
 from loguru import logger
 from tqdm import tqdm
 
-from used_addr_check.defaults import DEFAULT_INDEX_CHUNK_SIZE
+from used_addr_check.defaults import (
+    DEFAULT_INDEX_CHUNK_SIZE,
+    INDEX_ENTRY_MEMORY_ESTIMATE,
+    MIN_INDEX_BLOCK_SIZE,
+)
 from used_addr_check.index_types import IndexEntry
 
 
@@ -55,6 +59,104 @@ def generate_index(
     return index
 
 
+def choose_index_block_size(
+    haystack_file_size: int,
+    index_memory_budget: int,
+    index_entry_memory_estimate: int = INDEX_ENTRY_MEMORY_ESTIMATE,
+) -> int:
+    """
+    Picks the smallest block size for `generate_index_aligned` whose index is
+    expected to fit within a memory budget.
+
+    Args:
+    - haystack_file_size: Size of the haystack file, in bytes.
+    - index_memory_budget: Target in-memory size of the index, in bytes.
+    - index_entry_memory_estimate: In-memory size of one index entry, in bytes.
+        Defaults to the size of an `IndexEntry` in a `list[IndexEntry]`.
+
+    Returns:
+    - int: A block size in bytes. A power-of-two multiple of
+        `MIN_INDEX_BLOCK_SIZE`.
+    """
+    max_entries = max(1, index_memory_budget // index_entry_memory_estimate)
+    block_size = MIN_INDEX_BLOCK_SIZE
+    while haystack_file_size / block_size > max_entries:
+        block_size *= 2
+    return block_size
+
+
+def generate_index_aligned(
+    haystack_file_path: Path, index_block_size: int
+) -> list[IndexEntry]:
+    """
+    Generates an index for a large sorted text file, storing the first line
+    which starts at or after each `index_block_size`-aligned byte offset.
+
+    Each chunk then spans a predictable number of aligned blocks, and the index
+    size scales with the file size rather than the line count.
+
+    Args:
+    - haystack_file_path (Path): Path to the file to be indexed.
+    - index_block_size: The block size in bytes. Must be a multiple of
+        `MIN_INDEX_BLOCK_SIZE`.
+
+    Returns:
+    - List[IndexEntry]: A list of tuples containing
+            line text, byte offset, and line number.
+    """
+    if index_block_size <= 0 or index_block_size % MIN_INDEX_BLOCK_SIZE != 0:
+        msg = (
+            f"index_block_size must be a positive multiple of {MIN_INDEX_BLOCK_SIZE}, "
+            f"got {index_block_size}"
+        )
+        raise ValueError(msg)
+
+    index: list[IndexEntry] = []
+    haystack_file_size = haystack_file_path.stat().st_size
+    with (
+        tqdm(
+            unit="iB",
+            unit_scale=True,
+            unit_divisor=1024,
+            total=haystack_file_size,
+            desc="Indexing haystack file (aligned)",
+        ) as progress_bar,
+        haystack_file_path.open("rb") as file,
+    ):
+        block_offset = 0
+        line_number = 0  # Number of lines which start before `block_offset`.
+        prev_block_ended_line = True
+        while block := file.read(index_block_size):
+            # Find the first line start within this block (if any).
+            if prev_block_ended_line:
+                line_start = 0
+            else:
+                newline_pos = block.find(b"\n")
+                line_start = -1 if newline_pos == -1 else newline_pos + 1
+
+            if 0 <= line_start < len(block):
+                entry_offset = block_offset + line_start
+                file.seek(entry_offset)
+                line_value = file.readline()
+                file.seek(block_offset + len(block))
+
+                index.append(
+                    IndexEntry(
+                        line_value=line_value.strip().decode("utf-8"),
+                        byte_offset=entry_offset,
+                        line_number=line_number + block.count(b"\n", 0, line_start),
+                    )
+                )
+
+            line_number += block.count(b"\n")
+            prev_block_ended_line = block.endswith(b"\n")
+            block_offset += len(block)
+            if block_offset % (index_block_size * 1024) == 0:
+                progress_bar.n = block_offset
+                progress_bar.refresh()
+    return index
+
+
 def store_index_json(index: list[IndexEntry], index_json_file_path: Path) -> None:
     """
     Stores the index in a file for later use.
@@ -115,13 +217,20 @@ def load_or_generate_index(
     index_chunk_size: int = DEFAULT_INDEX_CHUNK_SIZE,
     *,
     force_recreate: bool = False,
+    index_block_size: int | None = None,
+    index_memory_budget: int | None = None,
 ) -> list[IndexEntry]:
     """Attempts to load an index from a file, or generates one if it doesn't,
     or if `force_recreate` is enabled.
 
     Tries to load the index from a Parquet file first, then from a JSON file.
 
-    If a file already exists, the `index_chunk_size` is ignored.
+    If `index_block_size` or `index_memory_budget` (bytes) is given, a new index
+    is generated in aligned mode (see `generate_index_aligned`), with the block
+    size chosen from the memory budget if not given explicitly. Otherwise, an
+    entry is stored every `index_chunk_size` lines.
+
+    If a file already exists, the chunk/block size arguments are ignored.
     """
     index_json_file_path = haystack_file_path.with_suffix(".index.json")
     index_parquet_file_path = haystack_file_path.with_suffix(".index.parquet")
@@ -130,7 +239,15 @@ def load_or_generate_index(
         not index_json_file_path.exists() and not index_parquet_file_path.exists()
     ):
         logger.info(f"Creating index for file: {haystack_file_path.name}")
-        index = generate_index(haystack_file_path, index_chunk_size=index_chunk_size)
+        if index_block_size is None and index_memory_budget is not None:
+            index_block_size = choose_index_block_size(
+                haystack_file_path.stat().st_size, index_memory_budget
+            )
+        if index_block_size is not None:
+            logger.info(f"Using aligned index with block size {index_block_size:,}")
+            index = generate_index_aligned(haystack_file_path, index_block_size)
+        else:
+            index = generate_index(haystack_file_path, index_chunk_size)
         logger.info(f"Index created with {len(index):,} entries")
 
         # store to main type (parquet)
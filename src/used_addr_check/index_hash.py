@@ -0,0 +1,293 @@
+import hashlib
+import math
+import mmap
+import struct
+import sys
+import tempfile
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import ExitStack
+from pathlib import Path
+from typing import BinaryIO
+
+from loguru import logger
+from tqdm import tqdm
+
+# Target fraction of occupied slots. Lower values mean shorter probe sequences
+# (fewer page touches per lookup), at the cost of a larger index file.
+DEFAULT_HASH_LOAD_FACTOR = 0.7
+
+_MAGIC = b"UACHT001"
+# magic, slot_count, entry_count, (padding to 32 bytes)
+_HEADER = struct.Struct("<8sQQ8x")
+_SLOT = struct.Struct("<Q")
+# A (home slot index, slot value) pair, in a temporary build partition.
+_RECORD = struct.Struct("<QQ")
+
+# Lines per build partition. Each partition is sorted in memory (as Python
+# tuples, about 150 bytes per line), so this bounds the build's memory use.
+DEFAULT_HASH_PARTITION_ENTRIES = 4 * 1024 * 1024
+
+# Each slot is a uint64: the top 16 bits are a fingerprint of the key's hash,
+# and the low 48 bits are (haystack byte offset + 1). Zero means empty.
+_OFFSET_BITS = 48
+_OFFSET_MASK = (1 << _OFFSET_BITS) - 1
+
+
+def _hash_key(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def _count_lines(file: BinaryIO) -> int:
+    line_count = 0
+    last_chunk = b""
+    while chunk := file.read(1024 * 1024):
+        line_count += chunk.count(b"\n")
+        last_chunk = chunk
+    if last_chunk and not last_chunk.endswith(b"\n"):
+        line_count += 1  # Final line without a trailing newline.
+    return line_count
+
+
+def line_matches(data: bytes, needle: bytes) -> bool:
+    """Checks whether `data`, read from the start of a haystack line, shows that
+    the line is exactly `needle`. `data` must be at least `len(needle) + 2` bytes
+    long (or run to EOF), to account for a trailing `\\r\\n`.
+    """
+    return data.split(b"\n", 1)[0].strip() == needle
+
+
+class HashIndex:
+    """An on-disk, open-addressed (linear probing) hash table of haystack lines.
+
+    Each slot stores a short fingerprint of the line's hash, plus the line's
+    byte offset in the haystack file. The table is memory-mapped, so a lookup
+    touches about one page of the index, plus at most one verification read of
+    the haystack per matching fingerprint.
+
+    Unlike the sorted indexes, this can only answer exact-match lookups.
+    """
+
+    def __init__(self, index_hash_file_path: Path) -> None:
+        self._file = index_hash_file_path.open("rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.slot_count, self.entry_count = _HEADER.unpack_from(self._mm)
+        if magic != _MAGIC:
+            self.close()
+            msg = f"Not a hash index file (bad magic: {magic!r})"
+            raise ValueError(msg)
+
+    def __len__(self) -> int:
+        return self.entry_count
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+    def candidate_offsets(self, needle: str) -> Iterator[int]:
+        """Yields the haystack byte offsets of lines whose fingerprint matches
+        the needle. Each candidate must be verified against the haystack (see
+        `line_matches`).
+        """
+        key_hash = _hash_key(needle.encode("utf-8"))
+        fingerprint = key_hash >> _OFFSET_BITS
+        slot_index = key_hash % self.slot_count
+        for _ in range(self.slot_count):
+            slot = _SLOT.unpack_from(self._mm, _HEADER.size + slot_index * 8)[0]
+            if slot == 0:
+                return
+            if slot >> _OFFSET_BITS == fingerprint:
+                yield (slot & _OFFSET_MASK) - 1
+            slot_index = (slot_index + 1) % self.slot_count
+
+    def search_many(self, haystack_file: BinaryIO, needles: Iterable[str]) -> set[str]:
+        """Searches for needles, verifying candidates against the open haystack.
+
+        Returns: The set of needles which were found in the haystack.
+        """
+        found_needles: set[str] = set()
+        for needle in needles:
+            needle_bytes = needle.encode("utf-8")
+            for offset in self.candidate_offsets(needle):
+                haystack_file.seek(offset)
+                if line_matches(
+                    haystack_file.read(len(needle_bytes) + 2), needle_bytes
+                ):
+                    found_needles.add(needle)
+                    break
+        return found_needles
+
+
+def _write_partitions(
+    haystack_file_path: Path,
+    partition_files: Sequence[BinaryIO],
+    slot_count: int,
+) -> None:
+    """First build pass: appends a `(home slot, slot value)` record for each
+    haystack line to the partition file which covers its home slot.
+    """
+    partition_count = len(partition_files)
+    haystack_file_size = haystack_file_path.stat().st_size
+    with (
+        tqdm(
+            unit="iB",
+            unit_scale=True,
+            unit_divisor=1024,
+            total=haystack_file_size,
+            desc="Hash-indexing haystack file",
+        ) as progress_bar,
+        haystack_file_path.open("rb") as file,
+    ):
+        offset = 0
+        for line_number, line in enumerate(file):
+            key = line.strip()
+            if key:
+                key_hash = _hash_key(key)
+                slot_index = key_hash % slot_count
+                slot = ((key_hash >> _OFFSET_BITS) << _OFFSET_BITS) | (offset + 1)
+                partition_files[slot_index * partition_count // slot_count].write(
+                    _RECORD.pack(slot_index, slot)
+                )
+            offset += len(line)
+
+            if line_number % 100_000 == 0:
+                progress_bar.n = offset
+                progress_bar.refresh()
+
+
+def _read_partition(partition_file: BinaryIO) -> list[tuple[int, int]]:
+    """Reads a partition's `(home slot, slot value)` records, sorted by slot."""
+    partition_file.seek(0)
+    records = array("Q")
+    records.frombytes(partition_file.read())
+    if sys.byteorder == "big":
+        records.byteswap()
+    return sorted(zip(records[0::2], records[1::2], strict=True))
+
+
+def _place_partition(
+    records: list[tuple[int, int]], slot_start: int, slot_end: int
+) -> tuple[array, list[tuple[int, int]]]:
+    """Second build pass, for one partition: places records (sorted by home
+    slot) in `[slot_start, slot_end)` with linear probing.
+
+    Because the records are sorted, each one goes in the first free slot at or
+    after both its home slot and the previous record's slot.
+
+    Returns: A tuple of (the partition's slots, the records which overflowed
+        past `slot_end`, to be placed first in the next partition).
+    """
+    slots = array("Q", bytes(_SLOT.size * (slot_end - slot_start)))
+    overflow: list[tuple[int, int]] = []
+    slot_index = slot_start - 1
+    for home_slot, slot in records:
+        slot_index = max(home_slot, slot_index + 1)
+        if slot_index >= slot_end:
+            overflow.append((home_slot, slot))
+        else:
+            slots[slot_index - slot_start] = slot
+    return slots, overflow
+
+
+def generate_hash_index(
+    haystack_file_path: Path,
+    index_hash_file_path: Path,
+    load_factor: float = DEFAULT_HASH_LOAD_FACTOR,
+    *,
+    partition_entries: int = DEFAULT_HASH_PARTITION_ENTRIES,
+) -> None:
+    """
+    Generates an on-disk hash index for a haystack file. The haystack does not
+    need to be sorted.
+
+    The table is built in two sequential passes, so it never needs to fit in
+    RAM, and is never written at random. First, each line's slot value is
+    appended to a temporary partition file by slot range. Then, each partition
+    is sorted by slot in memory, placed, and written out in slot order.
+
+    Args:
+    - haystack_file_path (Path): Path to the file to be indexed.
+    - index_hash_file_path (Path): Path to write the hash index to.
+    - load_factor: Target fraction of occupied slots (0 < load_factor < 1).
+    - partition_entries: Approximate number of lines per partition. Bounds the
+        memory used by the second pass.
+    """
+    assert 0 < load_factor < 1
+
+    haystack_file_size = haystack_file_path.stat().st_size
+    if haystack_file_size > _OFFSET_MASK - 1:
+        msg = f"Haystack file is too large for a hash index: {haystack_file_path}"
+        raise ValueError(msg)
+
+    with haystack_file_path.open("rb") as file:
+        line_count = _count_lines(file)
+    slot_count = max(1, math.ceil(line_count / load_factor))
+    partition_count = min(slot_count, max(1, -(-line_count // partition_entries)))
+
+    tmp_file_path = index_hash_file_path.with_name(index_hash_file_path.name + ".tmp")
+    with (
+        tempfile.TemporaryDirectory(dir=index_hash_file_path.parent) as tmp_dir,
+        ExitStack() as partition_stack,
+    ):
+        partition_files = [
+            partition_stack.enter_context(
+                (Path(tmp_dir) / f"partition_{i}.bin").open("w+b")
+            )
+            for i in range(partition_count)
+        ]
+        _write_partitions(haystack_file_path, partition_files, slot_count)
+
+        with tmp_file_path.open("w+b") as index_file:
+            index_file.write(_HEADER.pack(_MAGIC, slot_count, line_count))
+            overflow: list[tuple[int, int]] = []
+            for i, partition_file in enumerate(
+                tqdm(partition_files, desc="Writing hash index", unit="partition")
+            ):
+                # Partition `i` covers the slots `s` with `s * count // slots == i`.
+                slot_start = -(-i * slot_count // partition_count)
+                slot_end = -(-(i + 1) * slot_count // partition_count)
+                slots, overflow = _place_partition(
+                    overflow + _read_partition(partition_file), slot_start, slot_end
+                )
+                partition_file.truncate(0)  # Free the disk space early.
+                if sys.byteorder == "big":
+                    slots.byteswap()  # Always store little-endian.
+                index_file.write(slots.tobytes())
+
+            # Linear probing wraps around: place the last partition's overflow in
+            # the first free slots of the table.
+            slot_index = 0
+            for _, slot in overflow:
+                while True:
+                    index_file.seek(_HEADER.size + slot_index * _SLOT.size)
+                    if not _SLOT.unpack(index_file.read(_SLOT.size))[0]:
+                        break
+                    slot_index += 1
+                index_file.seek(_HEADER.size + slot_index * _SLOT.size)
+                index_file.write(_SLOT.pack(slot))
+    tmp_file_path.replace(index_hash_file_path)
+
+
+def load_or_generate_hash_index(
+    haystack_file_path: Path,
+    *,
+    force_recreate: bool = False,
+    load_factor: float = DEFAULT_HASH_LOAD_FACTOR,
+) -> HashIndex:
+    """Attempts to load a hash index from `orig_name.index.hash`, or generates
+    one if it doesn't exist, or if `force_recreate` is enabled.
+    """
+    index_hash_file_path = haystack_file_path.with_suffix(".index.hash")
+
+    if force_recreate or not index_hash_file_path.exists():
+        logger.info(f"Creating hash index for file: {haystack_file_path.name}")
+        generate_hash_index(haystack_file_path, index_hash_file_path, load_factor)
+        logger.info(
+            f"Hash index stored in {index_hash_file_path.name}, "
+            f"size: {index_hash_file_path.stat().st_size:,} bytes"
+        )
+
+    index = HashIndex(index_hash_file_path)
+    logger.info(f"Hash index loaded with {len(index):,} entries")
+    return index
@@ -1,13 +1,26 @@
 import bisect
 import json
+import os
+from collections.abc import Iterable
 from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
 
 from loguru import logger
 from tqdm import tqdm
 
-from used_addr_check.defaults import DEFAULT_INDEX_CHUNK_SIZE
+from used_addr_check.defaults import DEFAULT_INDEX_CHUNK_SIZE, MIN_INDEX_BLOCK_SIZE
+from used_addr_check.index_compact import load_or_generate_compact_index
 from used_addr_check.index_create import load_or_generate_index
-from used_addr_check.index_types import IndexEntry
+from used_addr_check.index_hash import HashIndex, load_or_generate_hash_index
+from used_addr_check.index_types import (
+    ChunkRange,
+    IndexEntry,
+    IndexOptions,
+    SearchIndex,
+)
+
+if TYPE_CHECKING:
+    from used_addr_check.result_cache import ResultCache
 
 
 def _binary_search_index(index: list[IndexEntry], needle: str) -> int:
@@ -92,11 +105,232 @@ def search_in_file_with_index(
     return False
 
 
-def search_multiple_in_file(
+def _chunk_byte_range(index: list[IndexEntry], position: int) -> ChunkRange:
+    """Returns the `[start, end)` byte range of the haystack chunk that starts at
+    `index[position]`. The `end` is None for the last chunk (read to EOF).
+    """
+    start_offset = index[position].byte_offset
+    end_offset = None
+    if position + 1 < len(index):
+        end_offset = index[position + 1].byte_offset
+    return start_offset, end_offset
+
+
+class SortedIndexLocator:
+    """A `ChunkLocator` over a sorted `list[IndexEntry]`.
+
+    The bisect key list is built once, so callers which search the same index
+    many times (e.g., follow mode, or the async searcher) should keep one of
+    these instead of passing the plain list each time.
+    """
+
+    def __init__(self, index: list[IndexEntry]) -> None:
+        self.index = index
+        self.index_values = [entry.line_value for entry in index]
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def locate_chunk(self, needle: str) -> ChunkRange | None:
+        position = bisect.bisect_right(self.index_values, needle) - 1
+        if position < 0:
+            return None
+        return _chunk_byte_range(self.index, position)
+
+
+def _group_needles_by_chunk(
+    index: SearchIndex, needles: Iterable[str]
+) -> dict[ChunkRange, set[str]]:
+    """Groups needles by the haystack chunk they could be in.
+
+    Needles which sort before the first index entry can't be in the haystack,
+    and are dropped.
+
+    Returns: A dict of `{chunk byte range: set of needles}`.
+    """
+    assert not isinstance(index, HashIndex), "Hash indexes have no chunks"
+    if isinstance(index, list):
+        index = SortedIndexLocator(index)
+
+    groups: dict[ChunkRange, set[str]] = {}
+    for needle in needles:
+        chunk_range = index.locate_chunk(needle)
+        if chunk_range is None:
+            continue
+        groups.setdefault(chunk_range, set()).add(needle)
+    return groups
+
+
+def _advise_willneed(file: BinaryIO, start_offset: int, end_offset: int | None) -> None:
+    """Hints to the OS that a byte range of the file will be read soon, so it can
+    start readahead. The range is widened to `MIN_INDEX_BLOCK_SIZE` boundaries.
+
+    No-op on platforms without `os.posix_fadvise` (e.g., Windows, macOS).
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    aligned_start = start_offset - (start_offset % MIN_INDEX_BLOCK_SIZE)
+    length = 0  # Zero means "to the end of the file".
+    if end_offset is not None:
+        length = -(-end_offset // MIN_INDEX_BLOCK_SIZE) * MIN_INDEX_BLOCK_SIZE
+        length -= aligned_start
+    os.posix_fadvise(file.fileno(), aligned_start, length, os.POSIX_FADV_WILLNEED)
+
+
+def _read_chunk_lines(
+    file: BinaryIO, start_offset: int, end_offset: int | None
+) -> set[str]:
+    """Reads the lines of a haystack chunk as a set of stripped strings."""
+    file.seek(start_offset)
+    data = file.read(-1 if end_offset is None else end_offset - start_offset)
+    return {line.strip().decode("ascii") for line in data.splitlines()}
+
+
+def search_batch_in_file_with_index(
+    haystack_file_path: Path,
+    needles: Iterable[str],
+    index: SearchIndex,
+    *,
+    show_progress: bool = False,
+) -> set[str]:
+    """Searches for many needles at once, using a pre-built index.
+
+    Needles which fall in the same chunk share a single read of that chunk, so
+    each chunk of the haystack file is read at most once.
+
+    Args:
+    - haystack_file_path: The path to the file to search.
+    - needles: The strings to search for in the file.
+    - index: The index as built by `create_index`, any other `ChunkLocator`
+        (e.g., a `CompactIndex`), or a `HashIndex`.
+    - show_progress: Whether to show a tqdm progress bar over the chunks.
+
+    Returns: The set of needles which were found in the file.
+    """
+    assert isinstance(haystack_file_path, Path)
+
+    if isinstance(index, HashIndex):
+        with haystack_file_path.open("rb") as file:
+            return index.search_many(file, needles)
+
+    groups = _group_needles_by_chunk(index, needles)
+
+    chunk_ranges = sorted(groups, key=lambda chunk_range: chunk_range[0])
+    found_needles: set[str] = set()
+    with haystack_file_path.open("rb") as file:
+        for i, chunk_range in enumerate(
+            tqdm(
+                chunk_ranges,
+                desc="Searching chunks",
+                unit="chunk",
+                disable=not show_progress,
+            )
+        ):
+            # Start readahead of the next chunk while this one is searched.
+            if i + 1 < len(chunk_ranges):
+                _advise_willneed(file, *chunk_ranges[i + 1])
+            chunk_lines = _read_chunk_lines(file, *chunk_range)
+            found_needles.update(groups[chunk_range] & chunk_lines)
+    return found_needles
+
+
+def load_or_generate_search_index(
+    haystack_file_path: Path,
+    index_options: IndexOptions | None = None,
+    *,
+    force_recreate: bool = False,
+) -> SearchIndex:
+    """Loads or generates an index of the requested type for the haystack file.
+
+    Args:
+    - haystack_file_path (Path): The path to the haystack file.
+    - index_options: The kind of index, and how to generate it. See
+        `IndexOptions`. Defaults to `IndexOptions()`.
+    - force_recreate: Whether to regenerate the index even if a file exists.
+    """
+    if index_options is None:
+        index_options = IndexOptions()
+    index_type = index_options.index_type
+
+    if index_type == "sorted":
+        return load_or_generate_index(
+            haystack_file_path,
+            index_options.index_chunk_size,
+            force_recreate=force_recreate,
+            index_block_size=index_options.index_block_size,
+            index_memory_budget=index_options.index_memory_budget,
+        )
+    if index_type == "front_coded":
+        return load_or_generate_compact_index(
+            haystack_file_path,
+            index_options.index_chunk_size,
+            force_recreate=force_recreate,
+            index_block_size=index_options.index_block_size,
+            index_memory_budget=index_options.index_memory_budget,
+        )
+
+    if index_type == "hash":
+        return load_or_generate_hash_index(
+            haystack_file_path, force_recreate=force_recreate
+        )
+
+    msg = f"Invalid index_type provided: {index_type}"
+    raise ValueError(msg)
+
+
+def _index_is_stale(haystack_file_path: Path, index_options: IndexOptions) -> bool:
+    """Checks whether an existing index file for the haystack is older than the
+    haystack itself (e.g., the list was re-extracted over the same path).
+    """
+    suffixes = {
+        "sorted": [".index.parquet", ".index.json"],
+        "front_coded": [".index.fc", ".index.parquet", ".index.json"],
+        "hash": [".index.hash"],
+    }[index_options.index_type]
+    haystack_mtime_ns = haystack_file_path.stat().st_mtime_ns
+    for suffix in suffixes:
+        index_file_path = haystack_file_path.with_suffix(suffix)
+        if (
+            index_file_path.exists()
+            and index_file_path.stat().st_mtime_ns < haystack_mtime_ns
+        ):
+            return True
+    return False
+
+
+def _search_needles_with_index(
+    haystack_file_path: Path,
+    needles: list[str],
+    index: "SearchIndex | None",
+    index_options: IndexOptions,
+    *,
+    force_recreate: bool = False,
+) -> set[str]:
+    """Searches with the given index, or loads one (and releases it after)."""
+    owns_index = index is None
+    if index is None:
+        index = load_or_generate_search_index(
+            haystack_file_path, index_options, force_recreate=force_recreate
+        )
+
+    # Do the search, reading each chunk of the haystack at most once.
+    try:
+        return search_batch_in_file_with_index(
+            haystack_file_path, needles, index=index, show_progress=True
+        )
+    finally:
+        if owns_index and isinstance(index, HashIndex):
+            index.close()
+
+
+def search_multiple_in_file(  # noqa: PLR0913 (keeps the original index_chunk_size)
     haystack_file_path: Path | str,
     needles: list[str] | str,
     *,
     index_chunk_size: int = DEFAULT_INDEX_CHUNK_SIZE,
+    index_options: IndexOptions | None = None,
+    index: "SearchIndex | None" = None,
+    result_cache: "ResultCache | None" = None,
 ) -> list[str]:
     """Searches for multiple needle strings in the file.
 
@@ -105,23 +339,54 @@ def search_multiple_in_file(
     Args:
     - haystack_file_path (Path): The path to the file to search.
     - needles: The list of strings to search for in the file.
+    - index_chunk_size: Used if the index must be generated. Shorthand for
+        `IndexOptions(index_chunk_size=...)`; ignored if `index_options` is set.
+    - index_options: The kind of index to use, and how to generate it. See
+        `IndexOptions`.
+    - index: An already-loaded index to use (e.g., a `SharedIndex` attached
+        from shared memory). If given, no index is loaded, and the index
+        arguments above are ignored. The caller remains responsible for it.
+    - result_cache: Optional persistent cache of previous results. Needles it
+        can answer are not searched for, and new results are recorded in it.
+        An index file older than the haystack is regenerated first, so stale
+        results are never recorded for the current haystack.
 
-    Returns: A list of the needles that were found in the file.
+    Returns: A list of the needles that were found in the file, in the same
+        order as `needles`.
     """
     if isinstance(needles, str):
         needles = [needles]
 
     haystack_file_path = Path(haystack_file_path)  # normalize to Path
     assert haystack_file_path.exists(), f"File not found: {haystack_file_path}"
+    if index_options is None:
+        index_options = IndexOptions(index_chunk_size=index_chunk_size)
+
+    needles_to_search: list[str] = needles
+    found_set: set[str] = set()
+    if result_cache is not None:
+        found_set, needles_to_search = result_cache.lookup(haystack_file_path, needles)
 
-    index = load_or_generate_index(haystack_file_path, index_chunk_size)
+    if needles_to_search:
+        force_recreate = False
+        if result_cache is not None and index is None:
+            force_recreate = _index_is_stale(haystack_file_path, index_options)
+            if force_recreate:
+                logger.warning(
+                    f"Index of {haystack_file_path.name} is older than the file; "
+                    "regenerating it"
+                )
+        found_set |= _search_needles_with_index(
+            haystack_file_path,
+            needles_to_search,
+            index,
+            index_options,
+            force_recreate=force_recreate,
+        )
+        if result_cache is not None:
+            result_cache.store(haystack_file_path, needles_to_search, found_set)
 
-    # Do the search.
-    found_needles = [
-        needle
-        for needle in tqdm(needles, desc="Searching needles", unit="needle")
-        if search_in_file_with_index(haystack_file_path, needle, index=index)
-    ]
+    found_needles = [needle for needle in needles if needle in found_set]
 
     logger.info(f"Found {len(found_needles):,}/{len(needles):,} needles in the file")
     logger.info(f"Needles found: {json.dumps(sorted(found_needles))}")
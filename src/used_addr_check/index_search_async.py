@@ -0,0 +1,267 @@
+import asyncio
+import os
+import threading
+from collections.abc import AsyncIterator, Callable, Iterable
+from concurrent.futures import Executor
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, TypeVar
+
+from loguru import logger
+
+from used_addr_check.index_hash import HashIndex, line_matches
+from used_addr_check.index_search import (
+    SortedIndexLocator,
+    _group_needles_by_chunk,
+    load_or_generate_search_index,
+)
+from used_addr_check.index_types import ChunkRange, IndexOptions
+
+if TYPE_CHECKING:
+    from used_addr_check.index_types import SearchIndex
+
+# Required on Windows to prevent newline translation; zero elsewhere.
+_O_BINARY: int = getattr(os, "O_BINARY", 0)
+
+_T = TypeVar("_T")
+
+
+class AsyncHaystackSearcher:
+    """Asyncio-native searcher for a single haystack file.
+
+    The index is loaded once, and a single file descriptor is shared by all
+    callers. File reads run in an executor, so the event loop is never blocked.
+
+    Concurrent callers which need the same chunk of the haystack share a single
+    read of that chunk. Cancelling one caller does not cancel reads that other
+    callers are waiting on.
+
+    Usage:
+    ```
+    async with AsyncHaystackSearcher(haystack_file_path) as searcher:
+        found = await searcher.check(["1abc...", "bc1q..."], timeout=5)
+    ```
+    """
+
+    def __init__(
+        self,
+        haystack_file_path: Path | str,
+        *,
+        index_options: IndexOptions | None = None,
+        executor: Executor | None = None,
+    ) -> None:
+        self.haystack_file_path = Path(haystack_file_path)
+        self.index_options = index_options or IndexOptions()
+        self._executor = executor
+
+        self._index: SearchIndex | None = None
+        self._fd: int | None = None
+        self._load_lock = asyncio.Lock()
+
+        # Only used on platforms without `os.pread` (i.e., Windows).
+        self._seek_lock = threading.Lock()
+
+        # In-flight chunk reads, keyed by chunk byte range.
+        self._chunk_reads: dict[ChunkRange, asyncio.Future[set[str]]] = {}
+        # All in-flight executor jobs using the fd or index, including those
+        # abandoned by cancelled callers. Waited for before closing.
+        self._blocking_jobs: set[asyncio.Future[set[str]]] = set()
+
+    async def __aenter__(self) -> "AsyncHaystackSearcher":  # noqa: PYI034
+        await self.load()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.aclose()
+
+    async def load(self) -> None:
+        """Loads (or generates) the index and opens the haystack file.
+
+        Safe to call multiple times; the work is only done once.
+        """
+        async with self._load_lock:
+            if self._index is not None:
+                return
+
+            assert self.haystack_file_path.exists(), (
+                f"File not found: {self.haystack_file_path}"
+            )
+            loop = asyncio.get_running_loop()
+            index = await loop.run_in_executor(
+                self._executor,
+                load_or_generate_search_index,
+                self.haystack_file_path,
+                self.index_options,
+            )
+            if isinstance(index, list):
+                # Build the bisect keys once, not on every `check()`.
+                index = SortedIndexLocator(index)
+            self._fd = os.open(self.haystack_file_path, os.O_RDONLY | _O_BINARY)
+            self._index = index
+
+    async def aclose(self) -> None:
+        """Waits for in-flight file reads (including ones abandoned by cancelled
+        callers), then closes the file descriptor and index.
+        """
+        while self._blocking_jobs:
+            await asyncio.gather(*self._blocking_jobs, return_exceptions=True)
+        self.close()
+
+    def close(self) -> None:
+        """Closes the shared haystack file descriptor (and hash index, if any).
+
+        Must not be called while reads are in flight; prefer `aclose()` (or
+        `async with`), which waits for them.
+        """
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if isinstance(self._index, HashIndex):
+            self._index.close()
+        self._index = None
+
+    def _read_chunk_lines_blocking(self, chunk_range: ChunkRange) -> set[str]:
+        assert self._fd is not None
+        start_offset, end_offset = chunk_range
+        if end_offset is None:
+            end_offset = os.fstat(self._fd).st_size
+        data = self._pread(end_offset - start_offset, start_offset)
+        return {line.strip().decode("ascii") for line in data.splitlines()}
+
+    def _pread(self, length: int, offset: int) -> bytes:
+        """Reads from the shared file descriptor, without moving its position."""
+        assert self._fd is not None
+        if hasattr(os, "pread"):
+            return os.pread(self._fd, length, offset)
+        with self._seek_lock:
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            return os.read(self._fd, length)
+
+    def _start_blocking_job(
+        self, func: Callable[[_T], set[str]], arg: _T
+    ) -> "asyncio.Future[set[str]]":
+        """Runs `func(arg)` in the executor, tracking it until it finishes.
+
+        Callers should await the job through `asyncio.shield`, so cancelling
+        them can't mark the job done while its thread still uses the fd.
+        """
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(self._executor, func, arg)
+        self._blocking_jobs.add(job)
+        job.add_done_callback(self._blocking_jobs.discard)
+        return job
+
+    def _get_chunk_read(self, chunk_range: ChunkRange) -> "asyncio.Future[set[str]]":
+        """Returns the shared in-flight read for a chunk, starting it if needed."""
+        chunk_read = self._chunk_reads.get(chunk_range)
+        if chunk_read is None:
+            chunk_read = self._start_blocking_job(
+                self._read_chunk_lines_blocking, chunk_range
+            )
+            self._chunk_reads[chunk_range] = chunk_read
+            chunk_read.add_done_callback(
+                lambda _: self._chunk_reads.pop(chunk_range, None)
+            )
+        return chunk_read
+
+    async def _search_chunk(
+        self, chunk_range: ChunkRange, needles: set[str]
+    ) -> set[str]:
+        # Shield, so that a cancelled caller doesn't cancel the shared read.
+        chunk_lines = await asyncio.shield(self._get_chunk_read(chunk_range))
+        return needles & chunk_lines
+
+    def _hash_search_blocking(self, needles: list[str]) -> set[str]:
+        assert isinstance(self._index, HashIndex)
+        found_needles: set[str] = set()
+        for needle in needles:
+            needle_bytes = needle.encode("utf-8")
+            for offset in self._index.candidate_offsets(needle):
+                data = self._pread(len(needle_bytes) + 2, offset)
+                if line_matches(data, needle_bytes):
+                    found_needles.add(needle)
+                    break
+        return found_needles
+
+    async def iter_found(self, needles: Iterable[str]) -> AsyncIterator[str]:
+        """Yields the needles found in the haystack, as each chunk is searched.
+
+        Needles are yielded in completion order, not in input order.
+        """
+        await self.load()
+        assert self._index is not None
+
+        if isinstance(self._index, HashIndex):
+            found_needles = await asyncio.shield(
+                self._start_blocking_job(self._hash_search_blocking, list(needles))
+            )
+            for needle in found_needles:
+                yield needle
+            return
+
+        # Locating each needle's chunk is CPU-bound; keep it off the event loop.
+        loop = asyncio.get_running_loop()
+        groups = await loop.run_in_executor(
+            self._executor, _group_needles_by_chunk, self._index, list(needles)
+        )
+        tasks = [
+            asyncio.ensure_future(self._search_chunk(chunk_range, chunk_needles))
+            for chunk_range, chunk_needles in groups.items()
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for needle in await next_done:
+                    yield needle
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def check(
+        self, needles: list[str] | str, *, timeout: float | None = None
+    ) -> list[str]:
+        """Searches for multiple needles in the haystack.
+
+        Args:
+        - needles: The list of strings to search for in the file.
+        - timeout: Optional timeout in seconds. Raises
+            `asyncio.TimeoutError` if exceeded.
+
+        Returns: A list of the needles that were found in the file, in the same
+            order as `needles`.
+        """
+        if isinstance(needles, str):
+            needles = [needles]
+
+        async def _collect() -> set[str]:
+            return {needle async for needle in self.iter_found(needles)}
+
+        found_set = await asyncio.wait_for(_collect(), timeout=timeout)
+        found_needles = [needle for needle in needles if needle in found_set]
+
+        logger.debug(f"Found {len(found_needles):,}/{len(needles):,} needles")
+        return found_needles
+
+
+async def check_addresses(
+    haystack_file_path: Path | str,
+    needles: list[str] | str,
+    *,
+    index_options: IndexOptions | None = None,
+    timeout: float | None = None,
+) -> list[str]:
+    """Async equivalent of `search_multiple_in_file`.
+
+    For many calls against the same haystack, prefer sharing one
+    `AsyncHaystackSearcher`, so the index is only loaded once.
+
+    Returns: A list of the needles that were found in the file.
+    """
+    async with AsyncHaystackSearcher(
+        haystack_file_path, index_options=index_options
+    ) as searcher:
+        return await searcher.check(needles, timeout=timeout)
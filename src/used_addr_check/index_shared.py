@@ -0,0 +1,326 @@
+import hashlib
+import importlib
+import mmap
+import os
+import struct
+import sys
+from multiprocessing import shared_memory
+from pathlib import Path
+from types import TracebackType
+
+from loguru import logger
+
+from used_addr_check.defaults import DEFAULT_INDEX_CHUNK_SIZE
+from used_addr_check.index_create import load_or_generate_index
+from used_addr_check.index_types import ChunkRange, IndexEntry, IndexOptions
+
+_MAGIC = b"UACSI001"
+# Written in native byte order, to detect files from a different-endian machine.
+_BYTE_ORDER_MARK = 0x0102030405060708
+# magic, byte order mark, entry_count, keys_blob_len
+_HEADER = struct.Struct("=8sQQQ")
+_ITEM_SIZE = 8  # All arrays are uint64.
+
+
+def _flatten_index(index: list[IndexEntry]) -> bytes:
+    """Serializes an index into the flat layout read by `SharedIndex`.
+
+    Layout (native byte order, all arrays uint64):
+    - header
+    - key_offsets[entry_count + 1]: start of each key in the keys blob
+    - byte_offsets[entry_count]
+    - line_numbers[entry_count]
+    - keys blob: all keys, concatenated
+    """
+    keys = [entry.line_value.encode("utf-8") for entry in index]
+    key_offsets = [0]
+    for key in keys:
+        key_offsets.append(key_offsets[-1] + len(key))
+
+    entry_count = len(index)
+    return b"".join(
+        [
+            _HEADER.pack(_MAGIC, _BYTE_ORDER_MARK, entry_count, key_offsets[-1]),
+            struct.pack(f"={entry_count + 1}Q", *key_offsets),
+            struct.pack(f"={entry_count}Q", *(entry.byte_offset for entry in index)),
+            struct.pack(f"={entry_count}Q", *(entry.line_number for entry in index)),
+            *keys,
+        ]
+    )
+
+
+def _open_untracked(name: str) -> mmap.mmap:
+    """Maps an existing POSIX shared memory block read-only, without registering
+    it with this process's resource tracker (like `track=False` on 3.13+).
+
+    Registering it would let the tracker (which may be shared with the
+    publishing process) destroy or forget about the block when this process
+    exits or unregisters it.
+    """
+    posixshmem = importlib.import_module("_posixshmem")
+    fd: int = posixshmem.shm_open("/" + name, os.O_RDONLY, 0o600)
+    try:
+        return mmap.mmap(fd, os.fstat(fd).st_size, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+
+
+class SharedIndex:
+    """A read-only, zero-copy view of an index stored as flat arrays in shared
+    memory or in a memory-mapped file.
+
+    Attaching to one does not copy or parse the index, so many processes can
+    share a single copy. Use `publish_index` / `attach_index` (shared memory),
+    or `write_index_file` / `open_index_file` (mmappable file) to create one.
+    """
+
+    def __init__(
+        self,
+        buffer: memoryview,
+        owner: shared_memory.SharedMemory | mmap.mmap | None = None,
+        name: str | None = None,
+    ) -> None:
+        self._owner = owner
+        self._name = name
+        self._buffer = buffer.toreadonly()
+
+        magic, byte_order_mark, self.entry_count, keys_blob_len = _HEADER.unpack_from(
+            self._buffer
+        )
+        if magic != _MAGIC:
+            msg = f"Not a shared index (bad magic: {magic!r})"
+            raise ValueError(msg)
+        if byte_order_mark != _BYTE_ORDER_MARK:
+            msg = "Shared index was written on a machine with another byte order"
+            raise ValueError(msg)
+
+        n = self.entry_count
+        pos = _HEADER.size
+        self._key_offsets = self._buffer[pos : pos + (n + 1) * _ITEM_SIZE].cast("Q")
+        pos += (n + 1) * _ITEM_SIZE
+        self._byte_offsets = self._buffer[pos : pos + n * _ITEM_SIZE].cast("Q")
+        pos += n * _ITEM_SIZE
+        self._line_numbers = self._buffer[pos : pos + n * _ITEM_SIZE].cast("Q")
+        pos += n * _ITEM_SIZE
+        self._keys = self._buffer[pos : pos + keys_blob_len]
+
+    def __len__(self) -> int:
+        return self.entry_count
+
+    def __enter__(self) -> "SharedIndex":  # noqa: PYI034
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    @property
+    def name(self) -> str | None:
+        """The shared memory block name, if this is backed by shared memory."""
+        return self._name
+
+    def _key(self, position: int) -> bytes:
+        return bytes(
+            self._keys[self._key_offsets[position] : self._key_offsets[position + 1]]
+        )
+
+    def entry(self, position: int) -> IndexEntry:
+        return IndexEntry(
+            line_value=self._key(position).decode("utf-8"),
+            byte_offset=self._byte_offsets[position],
+            line_number=self._line_numbers[position],
+        )
+
+    def to_entries(self) -> list[IndexEntry]:
+        """Copies the whole index into a regular `list[IndexEntry]`."""
+        return [self.entry(position) for position in range(self.entry_count)]
+
+    def locate_chunk(self, needle: str) -> ChunkRange | None:
+        """Returns the byte range of the chunk that `needle` could be in, or None
+        if the needle sorts before the first index entry.
+        """
+        needle_key = needle.encode("utf-8")
+        lo, hi = 0, self.entry_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) <= needle_key:
+                lo = mid + 1
+            else:
+                hi = mid
+        position = lo - 1
+        if position < 0:
+            return None
+
+        start_offset = self._byte_offsets[position]
+        end_offset = None
+        if position + 1 < self.entry_count:
+            end_offset = self._byte_offsets[position + 1]
+        return start_offset, end_offset
+
+    def close(self) -> None:
+        """Detaches from the underlying memory. Does not destroy shared memory;
+        see `unlink`.
+        """
+        for view in (
+            self._key_offsets,
+            self._byte_offsets,
+            self._line_numbers,
+            self._keys,
+            self._buffer,
+        ):
+            view.release()
+        if self._owner is not None:
+            self._owner.close()
+
+    def unlink(self) -> None:
+        """Destroys the underlying shared memory block. Only call this from the
+        process which published it, once no other process needs it.
+        """
+        if isinstance(self._owner, shared_memory.SharedMemory):
+            self._owner.unlink()
+
+
+def shared_index_name(haystack_file_path: Path) -> str:
+    """Returns a deterministic shared memory block name for a haystack file, so
+    other processes can attach to its index knowing only the haystack path.
+    """
+    path_hash = hashlib.sha256(str(haystack_file_path.absolute()).encode("utf-8"))
+    return f"uac_{path_hash.hexdigest()[:16]}"
+
+
+def publish_index(index: list[IndexEntry], name: str | None = None) -> SharedIndex:
+    """Copies an index into a new shared memory block.
+
+    The calling process owns the block, and must eventually call `unlink()` on
+    the returned `SharedIndex` (or use a `SharedIndexRegistry`).
+    """
+    data = _flatten_index(index)
+    shm = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+    assert shm.buf is not None
+    shm.buf[: len(data)] = data
+    return SharedIndex(shm.buf[: len(data)], owner=shm, name=shm.name)
+
+
+def attach_index(name: str) -> SharedIndex:
+    """Attaches read-only to an index published by `publish_index`, without
+    copying or parsing it.
+
+    The block is not registered with this process's resource tracker, so the
+    publishing process stays the only owner: it is not destroyed when this
+    process exits, nor forgotten by a tracker shared with the publisher.
+    """
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=name, track=False)
+        assert shm.buf is not None
+        return SharedIndex(shm.buf, owner=shm, name=name)
+    if os.name == "nt":
+        # Windows has no resource tracker; blocks live while any handle does.
+        shm = shared_memory.SharedMemory(name=name)
+        assert shm.buf is not None
+        return SharedIndex(shm.buf, owner=shm, name=name)
+    # Before Python 3.13, attaching with `SharedMemory` always registers the
+    # block with the resource tracker, so open it directly instead.
+    mm = _open_untracked(name)
+    return SharedIndex(memoryview(mm), owner=mm, name=name)
+
+
+def write_index_file(index: list[IndexEntry], index_shared_file_path: Path) -> None:
+    """Writes an index in the flat layout, for use with `open_index_file`."""
+    tmp_file_path = index_shared_file_path.with_name(
+        index_shared_file_path.name + ".tmp"
+    )
+    tmp_file_path.write_bytes(_flatten_index(index))
+    tmp_file_path.replace(index_shared_file_path)
+
+
+def open_index_file(index_shared_file_path: Path) -> SharedIndex:
+    """Memory-maps an index written by `write_index_file`, read-only. Processes
+    mapping the same file share its pages via the OS page cache.
+    """
+    with index_shared_file_path.open("rb") as file:
+        mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return SharedIndex(memoryview(mm), owner=mm)
+
+
+class SharedIndexRegistry:
+    """Publishes haystack indexes to shared memory, and manages their lifetime.
+
+    Use it in the parent process, before forking workers. Workers then call
+    `attach_index(shared_index_name(haystack_file_path))`. Closing the registry
+    destroys all published blocks.
+
+    Usage:
+    ```
+    with SharedIndexRegistry() as registry:
+        registry.publish_haystack(haystack_file_path)
+        ... # start workers, wait for them
+    ```
+    """
+
+    def __init__(self) -> None:
+        self._published: dict[str, SharedIndex] = {}
+
+    def __enter__(self) -> "SharedIndexRegistry":  # noqa: PYI034
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def publish_haystack(
+        self,
+        haystack_file_path: Path,
+        index_chunk_size: int = DEFAULT_INDEX_CHUNK_SIZE,
+        *,
+        index_options: IndexOptions | None = None,
+    ) -> SharedIndex:
+        """Loads (or generates) the haystack's index, and publishes it under
+        `shared_index_name(haystack_file_path)`. Publishing the same haystack
+        twice returns the existing block.
+
+        Args:
+        - haystack_file_path (Path): The path to the haystack file.
+        - index_chunk_size: Used if the index must be generated. Shorthand for
+            `IndexOptions(index_chunk_size=...)`; ignored if `index_options` is
+            set.
+        - index_options: How to generate the index, if needed. See
+            `IndexOptions`. Only the "sorted" index type is supported.
+        """
+        if index_options is None:
+            index_options = IndexOptions(index_chunk_size=index_chunk_size)
+        if index_options.index_type != "sorted":
+            msg = (
+                "Only the 'sorted' index type can be published, "
+                f"got {index_options.index_type!r}"
+            )
+            raise ValueError(msg)
+
+        name = shared_index_name(haystack_file_path)
+        if name not in self._published:
+            index = load_or_generate_index(
+                haystack_file_path,
+                index_options.index_chunk_size,
+                index_block_size=index_options.index_block_size,
+                index_memory_budget=index_options.index_memory_budget,
+            )
+            self._published[name] = publish_index(index, name=name)
+            logger.info(
+                f"Published index for {haystack_file_path.name} to shared memory "
+                f"'{name}' ({len(index):,} entries)"
+            )
+        return self._published[name]
+
+    def close(self) -> None:
+        """Closes and destroys all published shared memory blocks."""
+        for shared_index in self._published.values():
+            shared_index.close()
+            shared_index.unlink()
+        self._published.clear()
@@ -1,4 +1,14 @@
 from dataclasses import dataclass
+from typing import TYPE_CHECKING, Literal, Protocol, TypeAlias
+
+from used_addr_check.defaults import DEFAULT_INDEX_CHUNK_SIZE
+
+if TYPE_CHECKING:
+    from used_addr_check.index_hash import HashIndex
+
+# A `[start, end)` byte range of a haystack chunk. `end` is None for the last
+# chunk (read to EOF).
+ChunkRange: TypeAlias = tuple[int, int | None]
 
 
 @dataclass
@@ -6,3 +16,46 @@ class IndexEntry:
     line_value: str
     byte_offset: int
     line_number: int
+
+
+class ChunkLocator(Protocol):
+    """An index which isn't a plain `list[IndexEntry]`, but which can locate the
+    haystack chunk that a needle could be in.
+    """
+
+    def locate_chunk(self, needle: str) -> ChunkRange | None:
+        """Returns the byte range of the chunk that `needle` could be in, or None
+        if the needle sorts before the first line of the haystack.
+        """
+        ...
+
+
+# Any index usable by `search_batch_in_file_with_index`.
+SearchIndex: TypeAlias = "list[IndexEntry] | ChunkLocator | HashIndex"
+
+
+# The kinds of index which `load_or_generate_search_index` can build/load.
+# - "sorted": `list[IndexEntry]`, stored as Parquet (the default).
+# - "front_coded": `CompactIndex`, a prefix-compressed copy of the sorted index.
+# - "hash": `HashIndex`, an on-disk hash table for exact-match lookups.
+IndexType: TypeAlias = Literal["sorted", "front_coded", "hash"]
+
+
+@dataclass(frozen=True)
+class IndexOptions:
+    """Which kind of index to use for a haystack, and how to generate it if it
+    doesn't exist yet. See `load_or_generate_search_index`.
+
+    - index_type: The kind of index to use. See `IndexType`.
+    - index_chunk_size: Store an index entry every this many lines.
+    - index_block_size, index_memory_budget: If either is set, generate an
+        aligned index instead. See `load_or_generate_index`.
+
+    The sizes are ignored for the "hash" index type, and whenever an index file
+    already exists.
+    """
+
+    index_type: IndexType = "sorted"
+    index_chunk_size: int = DEFAULT_INDEX_CHUNK_SIZE
+    index_block_size: int | None = None
+    index_memory_budget: int | None = None
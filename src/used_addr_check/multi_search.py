@@ -0,0 +1,150 @@
+import re
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from loguru import logger
+
+from used_addr_check.index_hash import HashIndex
+from used_addr_check.index_search import (
+    load_or_generate_search_index,
+    search_batch_in_file_with_index,
+)
+from used_addr_check.index_types import IndexOptions
+
+
+@dataclass
+class HaystackSpec:
+    """A named haystack file, for `search_multiple_in_haystacks`.
+
+    If `address_regex` is set, only needles which fully match it are looked up
+    in this haystack (e.g., only bech32 addresses in a bech32-only list).
+    """
+
+    name: str
+    haystack_file_path: Path
+    address_regex: str | None = None
+
+    def __post_init__(self) -> None:
+        self.haystack_file_path = Path(self.haystack_file_path)
+
+
+def _normalize_haystacks(
+    haystacks: Sequence[HaystackSpec] | Mapping[str, Path | str],
+) -> list[HaystackSpec]:
+    if isinstance(haystacks, Mapping):
+        specs = [HaystackSpec(name, Path(path)) for name, path in haystacks.items()]
+    else:
+        specs = list(haystacks)
+
+    names = [spec.name for spec in specs]
+    assert len(names) == len(set(names)), f"Duplicate haystack names: {names}"
+    for spec in specs:
+        assert spec.haystack_file_path.exists(), (
+            f"File not found: {spec.haystack_file_path}"
+        )
+    return specs
+
+
+def _route_needles(spec: HaystackSpec, needles: list[str]) -> list[str]:
+    """Returns the needles which should be looked up in the given haystack."""
+    if spec.address_regex is None:
+        return needles
+    pattern = re.compile(spec.address_regex)
+    return [needle for needle in needles if pattern.fullmatch(needle)]
+
+
+def _search_one_haystack_file(
+    specs: list[HaystackSpec],
+    needles: list[str],
+    index_options: IndexOptions,
+) -> dict[str, set[str]]:
+    """Searches one haystack file for the needles routed to each of its specs.
+
+    The index is loaded once, and the union of the routed needles is searched
+    in one pass.
+
+    Returns: A `{haystack name: found needles}` dict.
+    """
+    routed_needles = {spec.name: _route_needles(spec, needles) for spec in specs}
+    all_needles: set[str] = set().union(*routed_needles.values())
+    if not all_needles:
+        return {name: set() for name in routed_needles}
+
+    haystack_file_path = specs[0].haystack_file_path
+    index = load_or_generate_search_index(haystack_file_path, index_options)
+    try:
+        found_set = search_batch_in_file_with_index(
+            haystack_file_path, all_needles, index
+        )
+    finally:
+        if isinstance(index, HashIndex):
+            index.close()
+    return {
+        name: found_set.intersection(spec_needles)
+        for name, spec_needles in routed_needles.items()
+    }
+
+
+def search_multiple_in_haystacks(
+    haystacks: Sequence[HaystackSpec] | Mapping[str, Path | str],
+    needles: list[str] | str,
+    *,
+    index_options: IndexOptions | None = None,
+    max_workers: int | None = None,
+) -> dict[str, list[str]]:
+    """Searches for multiple needle strings in several haystack files at once.
+
+    Needles are de-duplicated once, routed to the relevant haystacks (see
+    `HaystackSpec.address_regex`), and then each haystack file is searched
+    concurrently in a thread pool. Specs which share a file share one index
+    and one pass over it.
+
+    Args:
+    - haystacks: A list of `HaystackSpec`, or a `{name: haystack_file_path}`
+        mapping (which routes every needle to every haystack).
+    - needles: The list of strings to search for.
+    - index_options: The kind of index to use for every haystack, and how to
+        generate it. See `IndexOptions`.
+    - max_workers: Max number of haystack files to search concurrently.
+        Defaults to one thread per haystack file.
+
+    Returns: A `{haystack name: found needles}` dict, with the found needles in
+        the same order as `needles`.
+    """
+    if isinstance(needles, str):
+        needles = [needles]
+
+    specs = _normalize_haystacks(haystacks)
+    distinct_needles = list(dict.fromkeys(needles))
+
+    # Specs may share a file (e.g., with different regexes). Each file's index
+    # is loaded (or generated) by one thread only.
+    specs_by_file: dict[Path, list[HaystackSpec]] = {}
+    for spec in specs:
+        specs_by_file.setdefault(spec.haystack_file_path.resolve(), []).append(spec)
+
+    max_workers = max_workers or max(1, len(specs_by_file))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(
+                _search_one_haystack_file,
+                file_specs,
+                distinct_needles,
+                index_options or IndexOptions(),
+            )
+            for file_specs in specs_by_file.values()
+        ]
+        found_sets: dict[str, set[str]] = {}
+        for future in futures:
+            found_sets.update(future.result())
+
+    results: dict[str, list[str]] = {}
+    for name in (spec.name for spec in specs):
+        results[name] = [needle for needle in needles if needle in found_sets[name]]
+        logger.info(
+            f"Found {len(results[name]):,}/{len(needles):,} needles "
+            f"in haystack '{name}'"
+        )
+    return results
@@ -0,0 +1,355 @@
+import hashlib
+import sqlite3
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from types import TracebackType
+from typing import BinaryIO
+
+from loguru import logger
+from tqdm import tqdm
+
+from used_addr_check.index_create import generate_index
+from used_addr_check.index_search import search_batch_in_file_with_index
+
+_FINGERPRINT_READ_SIZE = 1024 * 1024
+
+# Max number of addresses per SQL `IN (...)` query.
+_SQL_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    address TEXT NOT NULL,
+    snapshot TEXT NOT NULL,
+    used INTEGER NOT NULL,
+    PRIMARY KEY (address, snapshot)
+);
+CREATE TABLE IF NOT EXISTS deltas (
+    old_snapshot TEXT NOT NULL,
+    new_snapshot TEXT NOT NULL,
+    delta_file_path TEXT NOT NULL,
+    PRIMARY KEY (old_snapshot, new_snapshot)
+);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    path TEXT NOT NULL PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL
+);
+"""
+
+
+def haystack_fingerprint(haystack_file_path: Path) -> str:
+    """Returns a content hash of a haystack file snapshot.
+
+    The whole file is hashed, in one streaming pass, so that any change to it
+    (even one which keeps its size) is detected. `ResultCache.snapshot` persists
+    it, so this is only done once per version of the file, across runs.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with (
+        tqdm(
+            unit="iB",
+            unit_scale=True,
+            unit_divisor=1024,
+            total=haystack_file_path.stat().st_size,
+            desc="Fingerprinting haystack file",
+        ) as progress_bar,
+        haystack_file_path.open("rb") as file,
+    ):
+        while data := file.read(_FINGERPRINT_READ_SIZE):
+            digest.update(data)
+            progress_bar.update(len(data))
+    return digest.hexdigest()
+
+
+def _iter_stripped_lines(file: BinaryIO) -> Iterator[bytes]:
+    for line in file:
+        stripped = line.strip()
+        if stripped:
+            yield stripped
+
+
+def compute_haystack_delta(
+    old_haystack_file_path: Path,
+    new_haystack_file_path: Path,
+    delta_file_path: Path,
+) -> int:
+    """
+    Writes the lines of the new haystack which are not in the old haystack.
+
+    Both haystacks must be sorted. They are merged in a single streaming pass,
+    so neither needs to fit in memory. The output is sorted too, so it can be
+    indexed and searched like a haystack.
+
+    Lines removed from the old haystack are not recorded (used-address lists
+    only grow), but a warning is logged if there are any.
+
+    Returns: The number of added lines.
+    """
+    added_count = 0
+    removed_count = 0
+    with (
+        old_haystack_file_path.open("rb") as old_file,
+        new_haystack_file_path.open("rb") as new_file,
+        delta_file_path.open("wb") as delta_file,
+    ):
+        old_lines = _iter_stripped_lines(old_file)
+        old_line = next(old_lines, None)
+        for new_line in _iter_stripped_lines(new_file):
+            while old_line is not None and old_line < new_line:
+                removed_count += 1
+                old_line = next(old_lines, None)
+            if old_line == new_line:
+                old_line = next(old_lines, None)
+            else:
+                delta_file.write(new_line + b"\n")
+                added_count += 1
+        if old_line is not None:
+            removed_count += 1 + sum(1 for _ in old_lines)
+
+    if removed_count:
+        logger.warning(
+            f"{removed_count:,} lines of {old_haystack_file_path.name} are not in "
+            f"{new_haystack_file_path.name}. Cached results assume haystacks "
+            "only grow."
+        )
+    return added_count
+
+
+def _search_deltas(delta_file_paths: list[Path], needles: list[str]) -> set[str]:
+    """Returns the needles which are in any of the (sorted) delta files."""
+    found_needles: set[str] = set()
+    for delta_file_path in delta_file_paths:
+        if delta_file_path.stat().st_size == 0:
+            continue
+        found_needles |= search_batch_in_file_with_index(
+            delta_file_path, needles, generate_index(delta_file_path)
+        )
+    return found_needles
+
+
+class ResultCache:
+    """Persistent (SQLite) cache of address lookup results.
+
+    Results are keyed by address and haystack snapshot (a hash of the haystack
+    file's content), so one cache can be shared by several haystacks.
+
+    - A result applies to the snapshot it was checked against, and to later
+      versions of that haystack, linked to it by deltas registered with
+      `register_delta`. Results from unrelated haystacks are never used.
+    - Positive results ("used") carry over to later versions, since used-address
+      lists only grow.
+    - Negative results from an earlier version are re-checked against only the
+      addresses added since. Without a delta, they are re-checked in full.
+
+    Usage:
+    ```
+    with ResultCache(cache_file_path) as result_cache:
+        result_cache.register_delta(yesterday_haystack, today_haystack)
+        search_multiple_in_file(today_haystack, needles, result_cache=result_cache)
+    ```
+    """
+
+    def __init__(self, cache_file_path: Path, delta_dir: Path | None = None) -> None:
+        self.cache_file_path = cache_file_path
+        self.delta_dir = delta_dir or cache_file_path.parent
+        self._conn = sqlite3.connect(cache_file_path)
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> "ResultCache":  # noqa: PYI034
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def snapshot(self, haystack_file_path: Path) -> str:
+        """Returns the fingerprint of the haystack's current snapshot.
+
+        Fingerprints are stored in the cache, keyed by path, size, mtime, and
+        inode, so each version of a file is only hashed once, across runs.
+        """
+        path = str(haystack_file_path.absolute())
+        stat = haystack_file_path.stat()
+        file_version = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, inode, fingerprint FROM fingerprints "
+            "WHERE path = ?",
+            (path,),
+        ).fetchone()
+        if row is not None and tuple(row[:3]) == file_version:
+            return row[3]
+
+        fingerprint = haystack_fingerprint(haystack_file_path)
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?)",
+                (path, *file_version, fingerprint),
+            )
+        return fingerprint
+
+    def register_delta(
+        self, old_haystack_file_path: Path, new_haystack_file_path: Path
+    ) -> None:
+        """Computes and records the addresses added between two snapshots of the
+        haystack, so negatives from the old snapshot can be re-checked cheaply.
+        """
+        old_snapshot = self.snapshot(old_haystack_file_path)
+        new_snapshot = self.snapshot(new_haystack_file_path)
+        if old_snapshot == new_snapshot or self._delta_path(old_snapshot, new_snapshot):
+            return
+
+        delta_file_path = self.delta_dir / f"delta_{old_snapshot}_{new_snapshot}.txt"
+        added_count = compute_haystack_delta(
+            old_haystack_file_path, new_haystack_file_path, delta_file_path
+        )
+        logger.info(f"Haystack delta has {added_count:,} added addresses")
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO deltas VALUES (?, ?, ?)",
+                (old_snapshot, new_snapshot, str(delta_file_path)),
+            )
+
+    def _delta_path(self, old_snapshot: str, new_snapshot: str) -> Path | None:
+        row = self._conn.execute(
+            "SELECT delta_file_path FROM deltas "
+            "WHERE old_snapshot = ? AND new_snapshot = ?",
+            (old_snapshot, new_snapshot),
+        ).fetchone()
+        if row is None or not Path(row[0]).exists():
+            return None
+        return Path(row[0])
+
+    def _delta_chain(self, old_snapshot: str, new_snapshot: str) -> list[Path] | None:
+        """Returns the delta files leading from one snapshot to another, or None
+        if the snapshots aren't connected by registered deltas.
+        """
+        edges: dict[str, list[tuple[str, str]]] = {}
+        for old, new, path in self._conn.execute("SELECT * FROM deltas"):
+            edges.setdefault(old, []).append((new, path))
+
+        # Breadth-first search, for the shortest chain.
+        chains: dict[str, list[Path]] = {old_snapshot: []}
+        frontier = [old_snapshot]
+        while frontier:
+            next_frontier = []
+            for snapshot in frontier:
+                for new, path in edges.get(snapshot, []):
+                    if new in chains or not Path(path).exists():
+                        continue
+                    chains[new] = [*chains[snapshot], Path(path)]
+                    next_frontier.append(new)
+            frontier = next_frontier
+        return chains.get(new_snapshot)
+
+    def _fetch(self, addresses: list[str]) -> Iterator[tuple[str, str, int]]:
+        for batch_start in range(0, len(addresses), _SQL_BATCH_SIZE):
+            batch = addresses[batch_start : batch_start + _SQL_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            yield from self._conn.execute(
+                "SELECT address, snapshot, used FROM results "
+                f"WHERE address IN ({placeholders})",
+                batch,
+            )
+
+    def lookup(
+        self, haystack_file_path: Path, needles: Iterable[str]
+    ) -> tuple[set[str], list[str]]:
+        """Answers as many needles as possible from the cache.
+
+        Results from an earlier version of the haystack are carried forward to
+        the current snapshot (negatives are re-checked against the registered
+        deltas first), and the earlier rows are deleted.
+
+        Returns: A tuple of (needles known to be used, needles which must still
+            be searched for in the haystack).
+        """
+        current_snapshot = self.snapshot(haystack_file_path)
+        distinct_needles = list(dict.fromkeys(needles))
+
+        # {snapshot: delta files leading to the current snapshot, or None}.
+        delta_chains: dict[str, list[Path] | None] = {current_snapshot: []}
+        known_used: set[str] = set()
+        known_unused: set[str] = set()
+        stale_by_snapshot: dict[str, set[str]] = {}
+        superseded_rows: list[tuple[str, str]] = []
+        for address, snapshot, used in self._fetch(distinct_needles):
+            if snapshot not in delta_chains:
+                delta_chains[snapshot] = self._delta_chain(snapshot, current_snapshot)
+            delta_chain = delta_chains[snapshot]
+            if delta_chain is None:
+                continue  # Checked against an unrelated haystack.
+            if used:
+                known_used.add(address)
+            elif not delta_chain:
+                known_unused.add(address)
+            else:
+                stale_by_snapshot.setdefault(snapshot, set()).add(address)
+            if delta_chain:
+                superseded_rows.append((address, snapshot))
+
+        for old_snapshot, stale_set in stale_by_snapshot.items():
+            stale_needles = sorted(stale_set - known_used - known_unused)
+            if stale_needles:
+                known_used |= _search_deltas(
+                    delta_chains[old_snapshot] or [], stale_needles
+                )
+                known_unused.update(stale_needles)
+        known_unused -= known_used
+
+        # Carry the earlier results forward to the current snapshot, replacing
+        # them, so each address keeps one row per haystack.
+        if superseded_rows:
+            with self._conn:
+                self._insert_results(
+                    current_snapshot,
+                    {address for address, _ in superseded_rows},
+                    known_used,
+                )
+                self._conn.executemany(
+                    "DELETE FROM results WHERE address = ? AND snapshot = ?",
+                    superseded_rows,
+                )
+
+        to_check = [
+            needle
+            for needle in distinct_needles
+            if needle not in known_used and needle not in known_unused
+        ]
+        logger.info(
+            f"Result cache answered {len(distinct_needles) - len(to_check):,}"
+            f"/{len(distinct_needles):,} needles"
+        )
+        return known_used, to_check
+
+    def _insert_results(
+        self, snapshot: str, checked_needles: Iterable[str], found_needles: set[str]
+    ) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+            (
+                (needle, snapshot, int(needle in found_needles))
+                for needle in checked_needles
+            ),
+        )
+
+    def store(
+        self,
+        haystack_file_path: Path,
+        checked_needles: Iterable[str],
+        found_needles: set[str],
+    ) -> None:
+        """Records the results of checking needles against the haystack's current
+        snapshot.
+        """
+        snapshot = self.snapshot(haystack_file_path)
+        with self._conn:
+            self._insert_results(snapshot, checked_needles, found_needles)
@@ -1,5 +1,5 @@
 import re
-from collections.abc import Sequence
+from collections.abc import Mapping, Sequence
 from pathlib import Path
 from typing import Literal
 
@@ -8,6 +8,9 @@ from ripgrepy import RipGrepNotFound, Ripgrepy
 
 from used_addr_check.defaults import DEFAULT_INDEX_CHUNK_SIZE
 from used_addr_check.index_search import search_multiple_in_file
+from used_addr_check.index_types import IndexOptions
+from used_addr_check.multi_search import HaystackSpec, search_multiple_in_haystacks
+from used_addr_check.result_cache import ResultCache
 
 # Source: https://ihateregex.io/expr/bitcoin-address/
 BITCOIN_ADDR_REGEX = r"\b((bc1|[13])[a-zA-HJ-NP-Z0-9]{25,39})\b"
@@ -113,10 +116,35 @@ def extract_addresses_from_file(
     raise RuntimeError(msg)
 
 
+def _extract_distinct_addresses_from_file(needle_file_path: Path) -> list[str]:
+    """Extracts the distinct bitcoin addresses from a needle file, with logging."""
+    needle_addresses = extract_addresses_from_file(needle_file_path)
+    logger.info(
+        f"Extracted {len(needle_addresses):,} addresses from the needle file "
+        f" ({needle_file_path})"
+    )
+
+    # remove duplicates (get distinct addresses)
+    count_before_distinct = len(needle_addresses)
+    needle_addresses = list(set(needle_addresses))
+    count_after_distinct = len(needle_addresses)
+    addr_count_change = count_after_distinct - count_before_distinct  # neg
+    if addr_count_change != 0:
+        logger.info(
+            "By removing duplicates, address count changed "
+            f"from {count_before_distinct:,} to {count_after_distinct:,}"
+            f" ({addr_count_change:,} addresses)."
+        )
+    return needle_addresses
+
+
 def scan_file_for_used_addresses(
     haystack_file_path: Path,
     needle_file_path: Path,
     index_chunk_size: int = DEFAULT_INDEX_CHUNK_SIZE,
+    *,
+    index_options: IndexOptions | None = None,
+    result_cache: ResultCache | None = None,
 ) -> None:
     """
     Scans a file for bitcoin addresses, and see which one have been used.
@@ -125,33 +153,58 @@ def scan_file_for_used_addresses(
     - haystack_file_path (Path): The path to the file to scan.
     - needle_file_path (Path): The path to the file with the list of addresses
         to search for in the haystack file.
+    - index_chunk_size, index_options: The kind of index to use, and how to
+        generate it. See `search_multiple_in_file`.
+    - result_cache: Optional persistent cache of previous results. See
+        `ResultCache`.
     """
     assert isinstance(haystack_file_path, Path)
     assert isinstance(needle_file_path, Path)
     assert haystack_file_path.exists(), f"File not found: {haystack_file_path}"
     assert needle_file_path.exists(), f"File not found: {needle_file_path}"
 
-    needle_addresses = extract_addresses_from_file(needle_file_path)
-    logger.info(
-        f"Extracted {len(needle_addresses):,} addresses from the needle file "
-        f" ({needle_file_path})"
-    )
-
-    # remove duplicates (get distinct addresses)
-    count_before_distinct = len(needle_addresses)
-    needle_addresses = list(set(needle_addresses))
-    count_after_distinct = len(needle_addresses)
-    addr_count_change = count_after_distinct - count_before_distinct  # neg
-    if addr_count_change != 0:
-        logger.info(
-            "By removing duplicates, address count changed "
-            f"from {count_before_distinct:,} to {count_after_distinct:,}"
-            f" ({addr_count_change:,} addresses)."
-        )
+    needle_addresses = _extract_distinct_addresses_from_file(needle_file_path)
 
     matched_addresses = search_multiple_in_file(
         haystack_file_path,
         needles=needle_addresses,
         index_chunk_size=index_chunk_size,
+        index_options=index_options,
+        result_cache=result_cache,
     )
     logger.info(f"Found {len(matched_addresses):,} used addresses in the file")
+
+
+def scan_file_for_used_addresses_multi(
+    haystacks: Sequence[HaystackSpec] | Mapping[str, Path | str],
+    needle_file_path: Path,
+    *,
+    index_options: IndexOptions | None = None,
+) -> dict[str, list[str]]:
+    """
+    Scans a file for bitcoin addresses, and see which ones are in each of
+    several haystack files. Addresses are only extracted from the needle file
+    once, and the haystacks are searched concurrently.
+
+    Args:
+    - haystacks: The haystack files. See `search_multiple_in_haystacks`.
+    - needle_file_path (Path): The path to the file with the list of addresses
+        to search for in the haystack files.
+    - index_options: The kind of index to use for every haystack, and how to
+        generate it. See `IndexOptions`.
+
+    Returns: A `{haystack name: found addresses}` dict.
+    """
+    assert isinstance(needle_file_path, Path)
+    assert needle_file_path.exists(), f"File not found: {needle_file_path}"
+
+    needle_addresses = _extract_distinct_addresses_from_file(needle_file_path)
+
+    matched_addresses = search_multiple_in_haystacks(
+        haystacks,
+        needles=needle_addresses,
+        index_options=index_options,
+    )
+    for name, addresses in matched_addresses.items():
+        logger.info(f"Found {len(addresses):,} used addresses in haystack '{name}'")
+    return matched_addresses
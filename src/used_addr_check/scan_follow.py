@@ -0,0 +1,191 @@
+import re
+import time
+from collections.abc import Iterator, Sequence
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import orjson
+from loguru import logger
+
+from used_addr_check.index_hash import HashIndex
+from used_addr_check.index_search import (
+    SortedIndexLocator,
+    load_or_generate_search_index,
+    search_batch_in_file_with_index,
+)
+from used_addr_check.index_types import IndexOptions, SearchIndex
+from used_addr_check.scan_file import BITCOIN_ADDR_REGEX
+
+_BITCOIN_ADDR_BYTES_PATTERN = re.compile(BITCOIN_ADDR_REGEX.encode("ascii"))
+
+# Max number of new bytes to read from one watched file per pass, so a large
+# backlog is processed (and checkpointed) incrementally.
+FOLLOW_MAX_READ_BYTES = 64 * 1024 * 1024
+
+
+@dataclass
+class FileCheckpoint:
+    """How far a watched file has been scanned.
+
+    If the file's inode changes (rotation) or it shrinks below `byte_offset`
+    (truncation), it is re-scanned from the start.
+    """
+
+    byte_offset: int
+    inode: int
+
+
+@dataclass
+class UsedAddressMatch:
+    """A used address, found in a watched needle file."""
+
+    needle_file_path: Path
+    address: str
+
+
+def load_checkpoints(checkpoint_file_path: Path) -> dict[str, FileCheckpoint]:
+    """Loads the `{watched file path: checkpoint}` dict, or an empty dict."""
+    if not checkpoint_file_path.exists():
+        return {}
+    raw_read: dict[str, dict] = orjson.loads(checkpoint_file_path.read_bytes())
+    return {path: FileCheckpoint(**val) for path, val in raw_read.items()}
+
+
+def store_checkpoints(
+    checkpoints: dict[str, FileCheckpoint], checkpoint_file_path: Path
+) -> None:
+    """Atomically stores the `{watched file path: checkpoint}` dict."""
+    tmp_file_path = checkpoint_file_path.with_name(checkpoint_file_path.name + ".tmp")
+    tmp_file_path.write_bytes(
+        orjson.dumps({path: asdict(val) for path, val in checkpoints.items()})
+    )
+    tmp_file_path.replace(checkpoint_file_path)
+
+
+def _read_new_lines(
+    needle_file_path: Path,
+    checkpoint: FileCheckpoint | None,
+    max_read_bytes: int,
+) -> tuple[bytes, FileCheckpoint]:
+    """Reads the complete lines appended since the checkpoint.
+
+    A trailing partial line is left for the next pass, so an address being
+    written is never split.
+
+    Returns: A tuple of (new bytes, updated checkpoint).
+    """
+    stat = needle_file_path.stat()
+    start_offset = 0
+    if checkpoint is not None and checkpoint.inode == stat.st_ino:
+        if stat.st_size >= checkpoint.byte_offset:
+            start_offset = checkpoint.byte_offset
+        else:
+            logger.info(f"File was truncated; re-scanning: {needle_file_path}")
+    elif checkpoint is not None:
+        logger.info(f"File was replaced; re-scanning: {needle_file_path}")
+
+    with needle_file_path.open("rb") as file:
+        file.seek(start_offset)
+        data = file.read(max_read_bytes)
+
+    if len(data) < max_read_bytes or b"\n" in data:
+        data = data[: data.rfind(b"\n") + 1]  # Only complete lines.
+    return data, FileCheckpoint(start_offset + len(data), stat.st_ino)
+
+
+def _check_addresses_in_batches(
+    haystack_file_path: Path,
+    index: SearchIndex,
+    addresses: list[str],
+    batch_size: int,
+) -> Iterator[str]:
+    for batch_start in range(0, len(addresses), batch_size):
+        batch = addresses[batch_start : batch_start + batch_size]
+        found_set = search_batch_in_file_with_index(haystack_file_path, batch, index)
+        yield from (address for address in batch if address in found_set)
+
+
+def follow_files_for_used_addresses(  # noqa: PLR0913
+    haystack_file_path: Path,
+    needle_file_paths: Sequence[Path],
+    checkpoint_file_path: Path,
+    *,
+    index_options: IndexOptions | None = None,
+    poll_interval: float = 1.0,
+    batch_size: int = 10_000,
+    max_passes: int | None = None,
+) -> Iterator[UsedAddressMatch]:
+    """
+    Watches growing needle files (e.g., append-only logs), and yields the used
+    addresses found in newly appended data, as they are found.
+
+    The index is loaded once and kept warm. On each pass, only bytes appended
+    since the persisted checkpoint are read and scanned, so the cost of a pass
+    scales with the new data, not the total file size.
+
+    Args:
+    - haystack_file_path (Path): The path to the haystack file.
+    - needle_file_paths: The files to watch for new addresses.
+    - checkpoint_file_path (Path): JSON file in which the checkpoint (byte
+        offset and inode) of each watched file is persisted.
+    - index_options: The kind of index to use, and how to generate it. See
+        `IndexOptions`.
+    - poll_interval: Seconds to sleep when no new data was found.
+    - batch_size: Max number of addresses to check against the index at once.
+    - max_passes: Stop after this many passes. None (default) runs forever.
+
+    Yields: A `UsedAddressMatch` for each used address found. An address which
+        appears in several new lines within one pass is only yielded once.
+    """
+    assert isinstance(haystack_file_path, Path)
+    assert haystack_file_path.exists(), f"File not found: {haystack_file_path}"
+    assert batch_size > 0
+
+    index = load_or_generate_search_index(haystack_file_path, index_options)
+    if isinstance(index, list):
+        # Build the bisect keys once, not for every micro-batch.
+        index = SortedIndexLocator(index)
+    checkpoints = load_checkpoints(checkpoint_file_path)
+
+    try:
+        pass_number = 0
+        while max_passes is None or pass_number < max_passes:
+            pass_number += 1
+            new_bytes_count = 0
+
+            for needle_file_path in needle_file_paths:
+                if not needle_file_path.exists():
+                    continue
+                key = str(needle_file_path.absolute())
+                data, new_checkpoint = _read_new_lines(
+                    needle_file_path, checkpoints.get(key), FOLLOW_MAX_READ_BYTES
+                )
+                new_bytes_count += len(data)
+
+                addresses = list(
+                    dict.fromkeys(
+                        match.group(0).decode("ascii")
+                        for match in _BITCOIN_ADDR_BYTES_PATTERN.finditer(data)
+                    )
+                )
+                if addresses:
+                    logger.debug(
+                        f"Checking {len(addresses):,} new addresses "
+                        f"from {needle_file_path}"
+                    )
+                for address in _check_addresses_in_batches(
+                    haystack_file_path, index, addresses, batch_size
+                ):
+                    yield UsedAddressMatch(needle_file_path, address)
+
+                if checkpoints.get(key) != new_checkpoint:
+                    checkpoints[key] = new_checkpoint
+                    store_checkpoints(checkpoints, checkpoint_file_path)
+
+            if new_bytes_count == 0 and (
+                max_passes is None or pass_number < max_passes
+            ):
+                time.sleep(poll_interval)
+    finally:
+        if isinstance(index, HashIndex):
+            index.close()
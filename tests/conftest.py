@@ -0,0 +1,54 @@
+import random
+import uuid
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Protocol
+
+import pytest
+
+
+class HaystackFactory(Protocol):
+    def __call__(
+        self,
+        name: str = "haystack.txt",
+        *,
+        line_count: int = 0,
+        lines: Iterable[str] = (),
+        prefix: str = "",
+        vary_length: bool = False,
+    ) -> tuple[Path, list[str]]:
+        """Writes a sorted haystack file into the test's tmp dir.
+
+        Args:
+        - name: The haystack file name.
+        - line_count: Number of random (uuid hex) lines to generate.
+        - lines: Extra explicit lines to include.
+        - prefix: Prepended to each generated line (e.g., "bc1q").
+        - vary_length: Whether to vary the generated lines' lengths (8 to 32
+            hex chars), so line starts don't fall on block boundaries.
+
+        Returns: A tuple of (haystack file path, sorted haystack lines).
+        """
+        ...
+
+
+@pytest.fixture
+def haystack_factory(tmp_path: Path) -> HaystackFactory:
+    def _make_haystack(
+        name: str = "haystack.txt",
+        *,
+        line_count: int = 0,
+        lines: Iterable[str] = (),
+        prefix: str = "",
+        vary_length: bool = False,
+    ) -> tuple[Path, list[str]]:
+        haystack_list = [
+            prefix + uuid.uuid4().hex[: random.randint(8, 32) if vary_length else 32]
+            for _ in range(line_count)
+        ]
+        haystack_list = sorted([*haystack_list, *lines])
+        haystack_path = tmp_path / name
+        haystack_path.write_text("\n".join(haystack_list) + "\n", encoding="utf-8")
+        return haystack_path, haystack_list
+
+    return _make_haystack
@@ -0,0 +1,70 @@
+import random
+
+import polars as pl
+import pytest
+
+from tests.conftest import HaystackFactory
+from used_addr_check.array_search import search_array_in_file
+from used_addr_check.index_types import IndexOptions
+
+
+@pytest.mark.parametrize("max_batch_bytes", [1_000, 256 * 1024 * 1024])
+def test_search_array_in_file_polars(
+    haystack_factory: HaystackFactory, max_batch_bytes: int
+) -> None:
+    haystack, haystack_list = haystack_factory(line_count=5_000)
+    found_needles = random.sample(haystack_list, k=50)
+    needles = [*found_needles, "0", "zzz", None, haystack_list[0], found_needles[0]]
+
+    result = search_array_in_file(
+        haystack,
+        pl.Series(needles),
+        index_options=IndexOptions(index_chunk_size=37),
+        with_line_numbers=True,
+        max_batch_bytes=max_batch_bytes,
+    )
+
+    assert isinstance(result.found, pl.Series)
+    assert result.found.to_list() == [True] * 50 + [False] * 3 + [True] * 2
+    assert isinstance(result.line_numbers, pl.Series)
+    assert result.line_numbers.to_list() == [
+        haystack_list.index(needle) if needle in haystack_list else None
+        for needle in needles
+    ]
+
+
+def test_search_array_in_file_numpy_and_arrow(
+    haystack_factory: HaystackFactory,
+) -> None:
+    np = pytest.importorskip("numpy")
+    pa = pytest.importorskip("pyarrow")
+
+    haystack, haystack_list = haystack_factory(line_count=1_000)
+    needles = [haystack_list[10], "not_there", haystack_list[-1]]
+
+    numpy_result = search_array_in_file(
+        haystack,
+        np.array([needle.encode("ascii") for needle in needles]),
+        index_options=IndexOptions(index_chunk_size=50),
+        with_line_numbers=True,
+    )
+    assert isinstance(numpy_result.found, np.ndarray)
+    assert pl.Series(numpy_result.found).to_list() == [True, False, True]
+    assert isinstance(numpy_result.line_numbers, np.ndarray)
+    assert pl.Series(numpy_result.line_numbers).to_list() == [
+        10,
+        -1,
+        len(haystack_list) - 1,
+    ]
+
+    arrow_result = search_array_in_file(
+        haystack,
+        pa.chunked_array([needles[:1], needles[1:]]),
+        index_options=IndexOptions(index_chunk_size=50),
+    )
+    assert isinstance(arrow_result.found, pa.Array)
+    assert pl.Series(arrow_result.found).to_list() == [True, False, True]
+    assert arrow_result.line_numbers is None
+
+    with pytest.raises(TypeError):
+        search_array_in_file(haystack, needles)  # pyright: ignore[reportArgumentType]
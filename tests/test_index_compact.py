@@ -0,0 +1,110 @@
+import random
+import uuid
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import HaystackFactory
+from used_addr_check.index_compact import (
+    CompactIndex,
+    load_index_compact,
+    load_or_generate_compact_index,
+    store_index_compact,
+)
+from used_addr_check.index_create import (
+    choose_index_block_size,
+    generate_index,
+    generate_index_aligned,
+)
+from used_addr_check.index_search import (
+    _group_needles_by_chunk,
+    search_multiple_in_file,
+)
+from used_addr_check.index_types import IndexOptions
+
+
+@pytest.mark.parametrize("restart_interval", [1, 3, 16])
+def test_compact_index_round_trip(
+    tmp_path: Path, haystack_factory: HaystackFactory, restart_interval: int
+) -> None:
+    haystack, _ = haystack_factory(line_count=5_000, prefix="bc1q", vary_length=True)
+    index = generate_index(haystack, index_chunk_size=7)
+
+    compact_index = CompactIndex.from_entries(index, restart_interval)
+    assert compact_index.to_entries() == index
+    assert len(compact_index) == len(index)
+
+    index_path = tmp_path / "haystack.index.fc"
+    store_index_compact(compact_index, index_path)
+    assert load_index_compact(index_path).to_entries() == index
+
+
+def test_compact_index_locates_same_chunks_as_list(
+    haystack_factory: HaystackFactory,
+) -> None:
+    haystack, haystack_list = haystack_factory(
+        line_count=5_000, prefix="bc1q", vary_length=True
+    )
+    index = generate_index(haystack, index_chunk_size=13)
+    compact_index = CompactIndex.from_entries(index)
+
+    needles = [
+        *random.sample(haystack_list, k=200),
+        *(entry.line_value for entry in index),
+        haystack_list[0],
+        haystack_list[-1],
+        "0",  # Before the first entry.
+        "zzz",  # After the last entry.
+        "bc1q" + uuid.uuid4().hex,
+    ]
+
+    assert _group_needles_by_chunk(compact_index, needles) == (
+        _group_needles_by_chunk(index, needles)
+    )
+
+
+def test_compact_index_is_smaller(haystack_factory: HaystackFactory) -> None:
+    haystack, _ = haystack_factory(line_count=5_000, prefix="bc1q", vary_length=True)
+    index = generate_index(haystack, index_chunk_size=1)
+
+    compact_index = CompactIndex.from_entries(index)
+
+    raw_key_bytes = sum(len(entry.line_value) for entry in index)
+    assert compact_index.nbytes < raw_key_bytes
+
+
+def test_search_with_front_coded_index(
+    tmp_path: Path, haystack_factory: HaystackFactory
+) -> None:
+    haystack, haystack_list = haystack_factory(
+        line_count=5_000, prefix="bc1q", vary_length=True
+    )
+    needles = [*random.sample(haystack_list, k=30), "bc1qmissing", "0"]
+
+    found = search_multiple_in_file(
+        haystack,
+        needles,
+        index_options=IndexOptions("front_coded", index_chunk_size=20),
+    )
+
+    assert found == needles[:30]
+    assert (tmp_path / "haystack.index.fc").exists()
+
+
+def test_compact_index_memory_budget_uses_compact_entry_size(
+    haystack_factory: HaystackFactory,
+) -> None:
+    """A memory budget gives a front-coded index denser than a list index."""
+    haystack, _ = haystack_factory(line_count=30_000, prefix="bc1q")
+    index_memory_budget = 8 * 1024
+
+    compact_index = load_or_generate_compact_index(
+        haystack, index_memory_budget=index_memory_budget
+    )
+    list_index = generate_index_aligned(
+        haystack,
+        choose_index_block_size(haystack.stat().st_size, index_memory_budget),
+    )
+
+    assert len(compact_index) > 2 * len(list_index)
+    assert compact_index.nbytes <= index_memory_budget
@@ -0,0 +1,75 @@
+import itertools
+import random
+
+import pytest
+
+from tests.conftest import HaystackFactory
+from used_addr_check.defaults import INDEX_ENTRY_MEMORY_ESTIMATE, MIN_INDEX_BLOCK_SIZE
+from used_addr_check.index_create import (
+    choose_index_block_size,
+    generate_index_aligned,
+    load_or_generate_index,
+)
+from used_addr_check.index_search import search_multiple_in_file
+
+
+@pytest.mark.parametrize("block_size", [4096, 8192, 65536])
+def test_generate_index_aligned(
+    haystack_factory: HaystackFactory, block_size: int
+) -> None:
+    haystack, haystack_list = haystack_factory(line_count=20_000, vary_length=True)
+    haystack_bytes = haystack.read_bytes()
+
+    index = generate_index_aligned(haystack, block_size)
+
+    assert index[0].byte_offset == 0
+    assert index[0].line_number == 0
+    for entry in index:
+        # Each entry is at a line start, with the correct value and line number.
+        assert entry.byte_offset == 0 or (
+            haystack_bytes[entry.byte_offset - 1 : entry.byte_offset] == b"\n"
+        )
+        assert haystack_list[entry.line_number] == entry.line_value
+
+    # Each entry is the first line start at/after its block boundary.
+    for prev_entry, entry in itertools.pairwise(index):
+        boundary = (entry.byte_offset // block_size) * block_size
+        assert prev_entry.byte_offset < boundary <= entry.byte_offset
+        line_before = haystack_bytes.rfind(b"\n", 0, entry.byte_offset - 1) + 1
+        assert line_before < boundary
+
+    assert len(index) <= len(haystack_bytes) // block_size + 1
+
+
+def test_generate_index_aligned_rejects_unaligned_block_size(
+    haystack_factory: HaystackFactory,
+) -> None:
+    haystack, _ = haystack_factory(line_count=10, vary_length=True)
+
+    with pytest.raises(ValueError, match="multiple of"):
+        generate_index_aligned(haystack, 1000)
+
+
+def test_choose_index_block_size() -> None:
+    file_size = 50 * 1024**3
+    budget = 16 * 1024**2
+
+    block_size = choose_index_block_size(file_size, budget)
+
+    assert block_size % MIN_INDEX_BLOCK_SIZE == 0
+    assert (file_size / block_size) * INDEX_ENTRY_MEMORY_ESTIMATE <= budget
+    assert (file_size / (block_size // 2)) * INDEX_ENTRY_MEMORY_ESTIMATE > budget
+
+    assert choose_index_block_size(1024, budget) == MIN_INDEX_BLOCK_SIZE
+
+
+def test_search_with_aligned_index(haystack_factory: HaystackFactory) -> None:
+    haystack, haystack_list = haystack_factory(line_count=20_000, vary_length=True)
+
+    index = load_or_generate_index(haystack, index_memory_budget=10_000)
+    assert len(index) > 1
+
+    needles = [*random.sample(haystack_list, k=50), "missing", "zzzz", "0"]
+    found = search_multiple_in_file(haystack, needles)
+
+    assert found == needles[:50]
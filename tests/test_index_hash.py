@@ -0,0 +1,92 @@
+import asyncio
+import random
+import uuid
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import HaystackFactory
+from used_addr_check import index_hash
+from used_addr_check.index_hash import (
+    DEFAULT_HASH_PARTITION_ENTRIES,
+    HashIndex,
+    generate_hash_index,
+)
+from used_addr_check.index_search import search_multiple_in_file
+from used_addr_check.index_search_async import check_addresses
+from used_addr_check.index_types import IndexOptions
+
+
+@pytest.mark.parametrize("partition_entries", [DEFAULT_HASH_PARTITION_ENTRIES, 7])
+@pytest.mark.parametrize("load_factor", [0.3, 0.7, 0.99])
+def test_hash_index_candidates(
+    tmp_path: Path,
+    haystack_factory: HaystackFactory,
+    load_factor: float,
+    partition_entries: int,
+) -> None:
+    haystack, haystack_list = haystack_factory(line_count=2_000)
+    index_path = tmp_path / "haystack.index.hash"
+
+    generate_hash_index(
+        haystack, index_path, load_factor, partition_entries=partition_entries
+    )
+    index = HashIndex(index_path)
+    try:
+        assert len(index) == len(haystack_list)
+        assert index.slot_count >= len(haystack_list) / load_factor
+
+        # Every line's offset is among its candidates.
+        offset = 0
+        for line in haystack_list:
+            assert offset in list(index.candidate_offsets(line))
+            offset += len(line) + 1
+    finally:
+        index.close()
+    # No temporary build files are left behind.
+    assert sorted(tmp_path.iterdir()) == sorted([haystack, index_path])
+
+
+def test_search_with_hash_index(
+    tmp_path: Path, haystack_factory: HaystackFactory
+) -> None:
+    haystack, haystack_list = haystack_factory(line_count=5_000)
+    needles = [
+        *random.sample(haystack_list, k=30),
+        haystack_list[0][:-1],  # A prefix of a line isn't a match.
+        uuid.uuid4().hex,
+    ]
+
+    found = search_multiple_in_file(
+        haystack, needles, index_options=IndexOptions("hash")
+    )
+    assert found == needles[:30]
+    assert (tmp_path / "haystack.index.hash").exists()
+
+    found_async = asyncio.run(
+        check_addresses(haystack, needles, index_options=IndexOptions("hash"))
+    )
+    assert found_async == needles[:30]
+
+
+def test_hash_index_probing_wraps_around(
+    tmp_path: Path, haystack_factory: HaystackFactory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Lines which overflow the last slot are placed at the start of the table."""
+    haystack, haystack_list = haystack_factory(line_count=20)
+    index_path = tmp_path / "haystack.index.hash"
+    # With 40 slots, every line's home slot is the last one.
+    monkeypatch.setattr(index_hash, "_hash_key", lambda _: 39)
+
+    generate_hash_index(haystack, index_path, load_factor=0.5, partition_entries=4)
+    index = HashIndex(index_path)
+    try:
+        assert index.slot_count == 40  # noqa: PLR2004
+        offsets = list(index.candidate_offsets(haystack_list[0]))
+    finally:
+        index.close()
+
+    line_offsets = [0]
+    for line in haystack_list[:-1]:
+        line_offsets.append(line_offsets[-1] + len(line) + 1)
+    assert sorted(offsets) == line_offsets
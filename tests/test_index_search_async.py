@@ -0,0 +1,124 @@
+import asyncio
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import HaystackFactory
+from used_addr_check.index_search import search_multiple_in_file
+from used_addr_check.index_search_async import AsyncHaystackSearcher, check_addresses
+from used_addr_check.index_types import IndexOptions
+
+
+def test_check_addresses_small(tmp_path: Path) -> None:
+    haystack = tmp_path / "haystack.txt"
+    haystack.write_text(
+        "\n".join(["alpha123", "beta456", "gamma789", "delta000"]) + "\n",  # noqa: FLY002
+        encoding="utf-8",
+    )
+
+    found = asyncio.run(check_addresses(haystack, ["alpha123", "gamma789", "nope"]))
+
+    assert found == ["alpha123", "gamma789"]
+
+
+def test_async_searcher_concurrent_callers_match_sync(
+    haystack_factory: HaystackFactory,
+) -> None:
+    """Many coroutines sharing one searcher get the same answers as the sync API."""
+    haystack, haystack_list = haystack_factory(line_count=5_000)
+
+    needle_batches = [
+        [*haystack_list[i * 37 : i * 37 + 5], uuid.uuid4().hex] for i in range(20)
+    ]
+
+    async def _run() -> list[list[str]]:
+        async with AsyncHaystackSearcher(
+            haystack, index_options=IndexOptions(index_chunk_size=100)
+        ) as searcher:
+            return await asyncio.gather(
+                *(searcher.check(batch, timeout=30) for batch in needle_batches)
+            )
+
+    results = asyncio.run(_run())
+
+    for batch, result in zip(needle_batches, results, strict=True):
+        assert result == search_multiple_in_file(haystack, batch)
+        assert result == batch[:5]
+
+
+def test_async_searcher_iter_found(haystack_factory: HaystackFactory) -> None:
+    haystack, haystack_list = haystack_factory(line_count=1_000)
+    needles = [haystack_list[0], haystack_list[500], haystack_list[-1], "missing"]
+
+    async def _run() -> list[str]:
+        async with AsyncHaystackSearcher(
+            haystack, index_options=IndexOptions(index_chunk_size=50)
+        ) as searcher:
+            return [needle async for needle in searcher.iter_found(needles)]
+
+    assert sorted(asyncio.run(_run())) == sorted(needles[:3])
+
+
+def test_async_searcher_exit_waits_for_abandoned_reads(
+    haystack_factory: HaystackFactory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Reads abandoned by a timed-out caller finish before the fd is closed."""
+    haystack, haystack_list = haystack_factory(line_count=1_000)
+    read_errors: list[Exception] = []
+    original_read = AsyncHaystackSearcher._read_chunk_lines_blocking  # noqa: SLF001
+
+    def _slow_read(
+        searcher: AsyncHaystackSearcher, chunk_range: tuple[int, int | None]
+    ) -> set[str]:
+        time.sleep(0.2)
+        try:
+            return original_read(searcher, chunk_range)
+        except Exception as e:
+            read_errors.append(e)
+            raise
+
+    monkeypatch.setattr(AsyncHaystackSearcher, "_read_chunk_lines_blocking", _slow_read)
+
+    async def _run() -> None:
+        async with AsyncHaystackSearcher(
+            haystack, index_options=IndexOptions(index_chunk_size=50)
+        ) as searcher:
+            with pytest.raises(asyncio.TimeoutError):
+                await searcher.check(haystack_list[::100], timeout=0.01)
+
+    asyncio.run(_run())
+    assert read_errors == []
+
+
+def test_async_searcher_concurrent_callers_share_chunk_reads(
+    haystack_factory: HaystackFactory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Overlapping callers needing the same chunks read each chunk only once."""
+    haystack, haystack_list = haystack_factory(line_count=1_000)
+    needles = haystack_list[::100]  # One needle in each of 10 chunks.
+    read_ranges: list[tuple[int, int | None]] = []
+    original_read = AsyncHaystackSearcher._read_chunk_lines_blocking  # noqa: SLF001
+
+    def _slow_read(
+        searcher: AsyncHaystackSearcher, chunk_range: tuple[int, int | None]
+    ) -> set[str]:
+        read_ranges.append(chunk_range)
+        time.sleep(0.2)  # Long enough for all callers to join the read.
+        return original_read(searcher, chunk_range)
+
+    monkeypatch.setattr(AsyncHaystackSearcher, "_read_chunk_lines_blocking", _slow_read)
+
+    async def _run() -> list[list[str]]:
+        async with AsyncHaystackSearcher(
+            haystack, index_options=IndexOptions(index_chunk_size=100)
+        ) as searcher:
+            return await asyncio.gather(
+                *(searcher.check(needles, timeout=30) for _ in range(8))
+            )
+
+    results = asyncio.run(_run())
+
+    assert results == [needles] * 8
+    assert len(read_ranges) == len(set(read_ranges)) == len(needles)
@@ -0,0 +1,107 @@
+import multiprocessing
+import random
+import uuid
+from multiprocessing import resource_tracker
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import HaystackFactory
+from used_addr_check.index_create import generate_index
+from used_addr_check.index_search import (
+    _group_needles_by_chunk,
+    search_multiple_in_file,
+)
+from used_addr_check.index_shared import (
+    SharedIndexRegistry,
+    attach_index,
+    open_index_file,
+    publish_index,
+    shared_index_name,
+    write_index_file,
+)
+from used_addr_check.index_types import IndexOptions
+
+
+def test_shared_index_round_trip_and_locate(
+    tmp_path: Path, haystack_factory: HaystackFactory
+) -> None:
+    haystack, haystack_list = haystack_factory(line_count=3_000)
+    index = generate_index(haystack, index_chunk_size=11)
+    needles = [*random.sample(haystack_list, k=100), "0", "zzz"]
+
+    published = publish_index(index)
+    try:
+        assert published.name is not None
+        with attach_index(published.name) as attached:
+            assert attached.to_entries() == index
+            assert _group_needles_by_chunk(attached, needles) == (
+                _group_needles_by_chunk(index, needles)
+            )
+    finally:
+        published.close()
+        published.unlink()
+
+    index_file = tmp_path / "haystack.index.flat"
+    write_index_file(index, index_file)
+    with open_index_file(index_file) as mapped:
+        assert mapped.to_entries() == index
+
+
+def _worker_search(haystack_file_path: Path, needles: list[str]) -> list[str]:
+    with attach_index(shared_index_name(haystack_file_path)) as shared_index:
+        return search_multiple_in_file(haystack_file_path, needles, index=shared_index)
+
+
+def test_shared_index_registry_with_worker_processes(
+    haystack_factory: HaystackFactory,
+) -> None:
+    haystack, haystack_list = haystack_factory(line_count=3_000)
+    needles = [*random.sample(haystack_list, k=20), uuid.uuid4().hex]
+
+    with SharedIndexRegistry() as registry:
+        registry.publish_haystack(haystack, index_chunk_size=50)
+
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(2) as pool:
+            results = pool.starmap(_worker_search, [(haystack, needles)] * 2)
+
+    assert results == [needles[:20]] * 2
+
+
+def test_attach_index_does_not_touch_resource_tracker(
+    haystack_factory: HaystackFactory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Attaching leaves the publisher's tracker registration alone."""
+    haystack, _ = haystack_factory(line_count=100)
+    tracker_calls: list[tuple[str, str]] = []
+    monkeypatch.setattr(
+        resource_tracker, "register", lambda *args: tracker_calls.append(args)
+    )
+    monkeypatch.setattr(
+        resource_tracker, "unregister", lambda *args: tracker_calls.append(args)
+    )
+
+    with SharedIndexRegistry() as registry:
+        published = registry.publish_haystack(haystack, index_chunk_size=10)
+        tracker_calls.clear()  # Only count calls made by attaching.
+        with attach_index(shared_index_name(haystack)) as attached:
+            assert attached.name == published.name
+            assert attached.to_entries() == published.to_entries()
+        assert tracker_calls == []
+
+
+def test_shared_index_registry_index_options(
+    haystack_factory: HaystackFactory,
+) -> None:
+    block_size = 16384
+    haystack, _ = haystack_factory(line_count=3_000)
+
+    with SharedIndexRegistry() as registry:
+        published = registry.publish_haystack(
+            haystack, index_options=IndexOptions(index_block_size=block_size)
+        )
+        assert len(published) == -(-haystack.stat().st_size // block_size)
+
+        with pytest.raises(ValueError, match="sorted"):
+            registry.publish_haystack(haystack, index_options=IndexOptions("hash"))
@@ -0,0 +1,96 @@
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import HaystackFactory
+from used_addr_check import multi_search
+from used_addr_check.index_create import load_or_generate_index
+from used_addr_check.index_types import IndexOptions, SearchIndex
+from used_addr_check.multi_search import HaystackSpec, search_multiple_in_haystacks
+
+
+def test_search_multiple_in_haystacks_mapping(
+    haystack_factory: HaystackFactory,
+) -> None:
+    """A plain mapping routes every needle to every haystack."""
+    haystack_a, _ = haystack_factory("a.txt", lines=["alpha", "beta", "gamma"])
+    haystack_b, _ = haystack_factory("b.txt", lines=["beta", "delta"])
+
+    needles = ["delta", "beta", "alpha", "missing", "beta"]
+    found = search_multiple_in_haystacks({"a": haystack_a, "b": haystack_b}, needles)
+
+    assert found == {
+        "a": ["beta", "alpha", "beta"],
+        "b": ["delta", "beta", "beta"],
+    }
+
+
+def test_search_multiple_in_haystacks_routing(
+    haystack_factory: HaystackFactory,
+) -> None:
+    """Needles are only looked up in haystacks whose regex they match."""
+    bech32 = "bc1qdf97u20sav0uxanvgkttmewljvjqh9ljpcmehm"
+    legacy = "12PCbUDS4ho7vgSccmixKTHmq9qL2mdSns"
+    haystack_all, _ = haystack_factory("all.txt", lines=[bech32, legacy])
+    haystack_watched, _ = haystack_factory("watched.txt", lines=[bech32, legacy])
+
+    found = search_multiple_in_haystacks(
+        [
+            HaystackSpec("all", haystack_all),
+            HaystackSpec("watched_bech32", haystack_watched, address_regex=r"bc1\w+"),
+        ],
+        [bech32, legacy],
+    )
+
+    assert found == {
+        "all": [bech32, legacy],
+        "watched_bech32": [bech32],
+    }
+
+
+def test_search_multiple_in_haystacks_aligned_index(
+    haystack_factory: HaystackFactory,
+) -> None:
+    """Index size options are used for every haystack's index."""
+    block_size = 65536
+    haystack_a, lines_a = haystack_factory("a.txt", line_count=5_000)
+    haystack_b, lines_b = haystack_factory("b.txt", line_count=5_000)
+
+    found = search_multiple_in_haystacks(
+        {"a": haystack_a, "b": haystack_b},
+        [lines_a[123], lines_b[456]],
+        index_options=IndexOptions(index_block_size=block_size),
+    )
+
+    assert found == {"a": [lines_a[123]], "b": [lines_b[456]]}
+    for haystack in (haystack_a, haystack_b):
+        index = load_or_generate_index(haystack)
+        assert len(index) == -(-haystack.stat().st_size // block_size)
+
+
+def test_search_multiple_in_haystacks_shared_file_loads_index_once(
+    haystack_factory: HaystackFactory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Specs sharing a file load its index once, and still route per spec."""
+    bech32 = "bc1qdf97u20sav0uxanvgkttmewljvjqh9ljpcmehm"
+    legacy = "12PCbUDS4ho7vgSccmixKTHmq9qL2mdSns"
+    haystack, _ = haystack_factory(lines=[bech32, legacy])
+    loaded_paths: list[Path] = []
+    original_load = multi_search.load_or_generate_search_index
+
+    def _counting_load(path: Path, index_options: IndexOptions) -> SearchIndex:
+        loaded_paths.append(path)
+        return original_load(path, index_options)
+
+    monkeypatch.setattr(multi_search, "load_or_generate_search_index", _counting_load)
+
+    found = search_multiple_in_haystacks(
+        [
+            HaystackSpec("bech32", haystack, address_regex=r"bc1\w+"),
+            HaystackSpec("legacy", haystack, address_regex=r"1\w+"),
+        ],
+        [bech32, legacy],
+    )
+
+    assert found == {"bech32": [bech32], "legacy": [legacy]}
+    assert loaded_paths == [haystack]
@@ -0,0 +1,194 @@
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import HaystackFactory
+from used_addr_check import result_cache
+from used_addr_check.index_search import search_multiple_in_file
+from used_addr_check.result_cache import (
+    ResultCache,
+    compute_haystack_delta,
+    haystack_fingerprint,
+)
+
+OLD_HAYSTACK = ["1AAA", "1CCC", "1EEE"]
+NEW_HAYSTACK = ["1AAA", "1BBB", "1CCC", "1DDD", "1EEE"]
+
+
+def test_compute_haystack_delta(
+    tmp_path: Path, haystack_factory: HaystackFactory
+) -> None:
+    old, _ = haystack_factory("old.txt", lines=OLD_HAYSTACK)
+    new, _ = haystack_factory("new.txt", lines=NEW_HAYSTACK)
+    delta = tmp_path / "delta.txt"
+
+    assert compute_haystack_delta(old, new, delta) == len(NEW_HAYSTACK) - len(
+        OLD_HAYSTACK
+    )
+    assert delta.read_text(encoding="utf-8") == "1BBB\n1DDD\n"
+
+    assert haystack_fingerprint(old) != haystack_fingerprint(new)
+    assert haystack_fingerprint(new) == haystack_fingerprint(
+        haystack_factory("new_copy.txt", lines=NEW_HAYSTACK)[0]
+    )
+
+
+def test_result_cache_rechecks_only_against_delta(
+    tmp_path: Path, haystack_factory: HaystackFactory
+) -> None:
+    old, _ = haystack_factory("old.txt", lines=OLD_HAYSTACK)
+    needles = ["1AAA", "1BBB", "1ZZZ"]
+
+    with ResultCache(tmp_path / "results.sqlite") as result_cache:
+        assert search_multiple_in_file(
+            old, needles, index_chunk_size=2, result_cache=result_cache
+        ) == ["1AAA"]
+
+        # Same snapshot: everything is answered from the cache.
+        assert result_cache.lookup(old, needles) == ({"1AAA"}, [])
+
+        # The haystack grows. Cached negatives are re-checked against the delta.
+        new, _ = haystack_factory("new.txt", lines=NEW_HAYSTACK)
+        result_cache.register_delta(old, new)
+        assert result_cache.lookup(new, [*needles, "1DDD"]) == (
+            {"1AAA", "1BBB"},
+            ["1DDD"],
+        )
+        assert search_multiple_in_file(
+            new, [*needles, "1DDD"], index_chunk_size=2, result_cache=result_cache
+        ) == ["1AAA", "1BBB", "1DDD"]
+
+    # Results persist across instances.
+    with ResultCache(tmp_path / "results.sqlite") as result_cache:
+        assert result_cache.lookup(new, needles) == ({"1AAA", "1BBB"}, [])
+
+
+def test_result_cache_without_delta_rechecks_in_full(
+    tmp_path: Path, haystack_factory: HaystackFactory
+) -> None:
+    old, _ = haystack_factory("old.txt", lines=OLD_HAYSTACK)
+    new, _ = haystack_factory("new.txt", lines=NEW_HAYSTACK)
+
+    with ResultCache(tmp_path / "results.sqlite") as result_cache:
+        search_multiple_in_file(old, ["1BBB"], result_cache=result_cache)
+        assert result_cache.lookup(new, ["1BBB"]) == (set(), ["1BBB"])
+        assert search_multiple_in_file(new, ["1BBB"], result_cache=result_cache) == [
+            "1BBB"
+        ]
+
+
+def test_haystack_fingerprint_detects_same_size_edits(
+    haystack_factory: HaystackFactory,
+) -> None:
+    haystack, haystack_list = haystack_factory(line_count=100_000)
+    fingerprint = haystack_fingerprint(haystack)
+
+    # Replace a line in the middle with another of the same length.
+    data = haystack.read_bytes()
+    old_line = haystack_list[len(haystack_list) // 2].encode("ascii")
+    haystack.write_bytes(data.replace(old_line, old_line[::-1]))
+
+    assert haystack.stat().st_size == len(data)
+    assert haystack_fingerprint(haystack) != fingerprint
+
+
+def test_result_cache_shared_by_haystacks(
+    tmp_path: Path, haystack_factory: HaystackFactory
+) -> None:
+    """Results for one haystack are never used for an unrelated haystack."""
+    haystack_a, _ = haystack_factory("a.txt", lines=["1AAA", "1CCC"])
+    haystack_b, _ = haystack_factory("b.txt", lines=["1BBB", "1CCC"])
+
+    with ResultCache(tmp_path / "results.sqlite") as result_cache:
+        assert search_multiple_in_file(
+            haystack_a, ["1AAA", "1BBB"], result_cache=result_cache
+        ) == ["1AAA"]
+        assert result_cache.lookup(haystack_b, ["1AAA", "1BBB"]) == (
+            set(),
+            ["1AAA", "1BBB"],
+        )
+        assert search_multiple_in_file(
+            haystack_b, ["1AAA", "1BBB"], result_cache=result_cache
+        ) == ["1BBB"]
+
+        # Both haystacks' results are kept.
+        assert result_cache.lookup(haystack_a, ["1AAA", "1BBB"]) == ({"1AAA"}, [])
+        assert result_cache.lookup(haystack_b, ["1AAA", "1BBB"]) == ({"1BBB"}, [])
+
+
+def test_result_cache_persists_fingerprints(
+    tmp_path: Path, haystack_factory: HaystackFactory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Each version of a haystack is only hashed once, across cache instances."""
+    old, _ = haystack_factory("old.txt", lines=OLD_HAYSTACK)
+    new, _ = haystack_factory("new.txt", lines=NEW_HAYSTACK)
+    hashed_paths: list[Path] = []
+
+    def _counting_fingerprint(haystack_file_path: Path) -> str:
+        hashed_paths.append(haystack_file_path)
+        return haystack_fingerprint(haystack_file_path)
+
+    monkeypatch.setattr(result_cache, "haystack_fingerprint", _counting_fingerprint)
+
+    with ResultCache(tmp_path / "results.sqlite") as cache:
+        cache.register_delta(old, new)
+        search_multiple_in_file(new, ["1BBB"], result_cache=cache)
+    assert sorted(hashed_paths) == sorted([old, new])
+
+    hashed_paths.clear()
+    with ResultCache(tmp_path / "results.sqlite") as cache:
+        cache.register_delta(old, new)
+        assert search_multiple_in_file(new, ["1BBB"], result_cache=cache) == ["1BBB"]
+    assert hashed_paths == []
+
+    # A new version of the file is hashed again.
+    new.write_text("\n".join(NEW_HAYSTACK) + "\n1FFF\n", encoding="utf-8")
+    with ResultCache(tmp_path / "results.sqlite") as cache:
+        cache.snapshot(new)
+    assert hashed_paths == [new]
+
+
+def test_result_cache_regenerates_stale_index(
+    tmp_path: Path, haystack_factory: HaystackFactory
+) -> None:
+    """An index older than its haystack is not used to record results."""
+    haystack, _ = haystack_factory(lines=OLD_HAYSTACK)
+    search_multiple_in_file(haystack, ["1AAA"], index_chunk_size=1)  # Indexes it.
+
+    # The list is re-extracted over the same path, after the index was built.
+    haystack.write_text("\n".join(NEW_HAYSTACK) + "\n", encoding="utf-8")
+    index_mtime_ns = haystack.with_suffix(".index.parquet").stat().st_mtime_ns
+    os.utime(haystack, ns=(index_mtime_ns + 10**9, index_mtime_ns + 10**9))
+
+    with ResultCache(tmp_path / "results.sqlite") as cache:
+        assert search_multiple_in_file(
+            haystack, ["1BBB", "1DDD", "1EEE"], index_chunk_size=1, result_cache=cache
+        ) == ["1BBB", "1DDD", "1EEE"]
+
+
+def test_result_cache_replaces_carried_forward_rows(
+    tmp_path: Path, haystack_factory: HaystackFactory
+) -> None:
+    """Results carried forward to a new snapshot replace the earlier rows."""
+    old, _ = haystack_factory("old.txt", lines=OLD_HAYSTACK)
+    new, _ = haystack_factory("new.txt", lines=NEW_HAYSTACK)
+    needles = ["1AAA", "1BBB", "1ZZZ"]
+
+    with ResultCache(tmp_path / "results.sqlite") as cache:
+        search_multiple_in_file(old, needles, result_cache=cache)
+        cache.register_delta(old, new)
+        assert cache.lookup(new, needles) == ({"1AAA", "1BBB"}, [])
+        assert cache.lookup(new, needles) == ({"1AAA", "1BBB"}, [])
+
+    with sqlite3.connect(tmp_path / "results.sqlite") as conn:
+        rows = conn.execute(
+            "SELECT address, snapshot, used FROM results ORDER BY address"
+        ).fetchall()
+    new_snapshot = haystack_fingerprint(new)
+    assert rows == [
+        ("1AAA", new_snapshot, 1),
+        ("1BBB", new_snapshot, 1),
+        ("1ZZZ", new_snapshot, 0),
+    ]
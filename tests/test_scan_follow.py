@@ -0,0 +1,103 @@
+from pathlib import Path
+
+import pytest
+
+from used_addr_check.index_search import SortedIndexLocator
+from used_addr_check.index_types import IndexEntry
+from used_addr_check.scan_follow import (
+    FileCheckpoint,
+    follow_files_for_used_addresses,
+    load_checkpoints,
+)
+
+USED_ADDRS = [
+    "12PCbUDS4ho7vgSccmixKTHmq9qL2mdSns",
+    "1PC9aZC4hNX2rmmrt7uHTfYAS3hRbph4UN",
+    "3E8ociqZa9mZUSwGdSmAEMAoAxBK3FNDcd",
+    "bc1qdf97u20sav0uxanvgkttmewljvjqh9ljpcmehm",
+]
+UNUSED_ADDR = "15ruLg4LeREntByp7Xyzhf5hu2qGn8ta2o"
+
+
+def _follow_once(haystack: Path, log_file: Path, checkpoint_file: Path) -> list[str]:
+    return [
+        match.address
+        for match in follow_files_for_used_addresses(
+            haystack, [log_file], checkpoint_file, max_passes=1
+        )
+    ]
+
+
+def test_follow_only_scans_appended_data(tmp_path: Path) -> None:
+    haystack = tmp_path / "haystack.txt"
+    haystack.write_text("\n".join(sorted(USED_ADDRS)) + "\n", encoding="utf-8")
+    log_file = tmp_path / "mempool.log"
+    checkpoint_file = tmp_path / "checkpoint.json"
+
+    log_file.write_text(
+        f"tx in: {USED_ADDRS[0]}\ntx in: {UNUSED_ADDR}\n", encoding="utf-8"
+    )
+    assert _follow_once(haystack, log_file, checkpoint_file) == [USED_ADDRS[0]]
+
+    checkpoint = load_checkpoints(checkpoint_file)[str(log_file.absolute())]
+    assert checkpoint == FileCheckpoint(
+        byte_offset=log_file.stat().st_size, inode=log_file.stat().st_ino
+    )
+
+    # Nothing new: nothing re-reported.
+    assert _follow_once(haystack, log_file, checkpoint_file) == []
+
+    # Append a complete line, plus a partial line still being written.
+    with log_file.open("a", encoding="utf-8") as f:
+        f.write(f"tx out: {USED_ADDRS[3]}\ntx out: {USED_ADDRS[1][:10]}")
+    assert _follow_once(haystack, log_file, checkpoint_file) == [USED_ADDRS[3]]
+
+    # Finish the partial line.
+    with log_file.open("a", encoding="utf-8") as f:
+        f.write(f"{USED_ADDRS[1][10:]}\n")
+    assert _follow_once(haystack, log_file, checkpoint_file) == [USED_ADDRS[1]]
+
+
+def test_follow_rescans_truncated_file(tmp_path: Path) -> None:
+    haystack = tmp_path / "haystack.txt"
+    haystack.write_text("\n".join(sorted(USED_ADDRS)) + "\n", encoding="utf-8")
+    log_file = tmp_path / "mempool.log"
+    checkpoint_file = tmp_path / "checkpoint.json"
+
+    log_file.write_text(f"{USED_ADDRS[0]}\n{USED_ADDRS[1]}\n", encoding="utf-8")
+    assert _follow_once(haystack, log_file, checkpoint_file) == USED_ADDRS[:2]
+
+    log_file.write_text(f"{USED_ADDRS[2]}\n", encoding="utf-8")
+    assert _follow_once(haystack, log_file, checkpoint_file) == [USED_ADDRS[2]]
+
+
+def test_follow_builds_index_keys_once(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Micro-batches reuse the bisect keys built when the index is loaded."""
+    haystack = tmp_path / "haystack.txt"
+    haystack.write_text("\n".join(sorted(USED_ADDRS)) + "\n", encoding="utf-8")
+    log_file = tmp_path / "mempool.log"
+    log_file.write_text("\n".join([*USED_ADDRS, UNUSED_ADDR]) + "\n", encoding="utf-8")
+    key_builds: list[int] = []
+    original_init = SortedIndexLocator.__init__
+
+    def _counting_init(self: SortedIndexLocator, index: list[IndexEntry]) -> None:
+        key_builds.append(len(index))
+        original_init(self, index)
+
+    monkeypatch.setattr(SortedIndexLocator, "__init__", _counting_init)
+
+    found = [
+        match.address
+        for match in follow_files_for_used_addresses(
+            haystack,
+            [log_file],
+            tmp_path / "checkpoint.json",
+            batch_size=1,
+            max_passes=1,
+        )
+    ]
+
+    assert found == USED_ADDRS
+    assert len(key_builds) == 1